@@ -1,6 +1,24 @@
+from django.core.cache import cache
 from rest_framework.permissions import BasePermission
 from accounts.models import Librarian
 
+# Ключ и время жизни (в секундах) кеша статуса библиотекаря
+LIBRARIAN_CACHE_KEY = "perm:lib:{user_id}"
+LIBRARIAN_CACHE_TIMEOUT = 300
+
+
+def get_librarian_cache_key(user_id):
+    """
+    Возвращает ключ кеша статуса библиотекаря для пользователя.
+    
+    Args:
+        user_id (int): ID пользователя
+        
+    Returns:
+        str: Ключ кеша в формате "perm:lib:{user_id}"
+    """
+    return LIBRARIAN_CACHE_KEY.format(user_id=user_id)
+
 
 class IsAdminOrLibrarian(BasePermission):
     """
@@ -26,8 +44,41 @@ class IsAdminOrLibrarian(BasePermission):
     Performance:
         Выполняет дополнительный запрос к базе данных для проверки
         статуса библиотекаря, но только для не-администраторов.
+        Результат кешируется на объекте запроса, поэтому повторные
+        проверки (has_object_permission) не обращаются к базе данных,
+        а также в django.core.cache на LIBRARIAN_CACHE_TIMEOUT секунд
+        (кеш сбрасывается сигналами при создании/удалении Librarian).
     """
 
+    def _is_librarian(self, request):
+        """
+        Проверяет, является ли пользователь библиотекарем.
+        
+        Выполняет запрос к базе данных не более одного раза за запрос:
+        результат сохраняется в атрибуте request._is_librarian_cached
+        и в django.core.cache по ключу get_librarian_cache_key(user_id).
+        
+        Args:
+            request: HTTP запрос с информацией о пользователе
+            
+        Returns:
+            bool: True, если пользователь связан с моделью Librarian
+        """
+        is_librarian = getattr(request, "_is_librarian_cached", None)
+        if is_librarian is None:
+            user_id = request.user.id
+            try:
+                is_librarian = cache.get_or_set(
+                    get_librarian_cache_key(user_id),
+                    lambda: Librarian.objects.filter(user_id=user_id).exists(),
+                    timeout=LIBRARIAN_CACHE_TIMEOUT,
+                )
+            except Exception:
+                # В случае ошибки базы данных запрещаем доступ (без кеширования)
+                return False
+            request._is_librarian_cached = is_librarian
+        return is_librarian
+
     def has_permission(self, request, view):
         """
         Проверяет, имеет ли пользователь разрешение на выполнение запроса.
@@ -53,17 +104,8 @@ class IsAdminOrLibrarian(BasePermission):
         if request.user.is_staff:
             return True
             
-        # Проверяем, является ли пользователь библиотекарем
-        try:
-            # Используем exists() для оптимизации запроса
-            if Librarian.objects.filter(user=request.user).exists():
-                return True
-        except Exception:
-            # В случае ошибки базы данных запрещаем доступ
-            return False
-            
-        # Во всех остальных случаях доступ запрещен
-        return False
+        # Проверяем, является ли пользователь библиотекарем (результат кешируется)
+        return self._is_librarian(request)
     
     def has_object_permission(self, request, view, obj):
         """
@@ -80,7 +122,8 @@ class IsAdminOrLibrarian(BasePermission):
         Note:
             Использует ту же логику, что и has_permission,
             так как библиотекари имеют доступ ко всем объектам
-            в рамках своих разрешений.
+            в рамках своих разрешений. Статус библиотекаря берется
+            из кеша запроса, заполненного в has_permission.
         """
-        # Применяем ту же логику проверки разрешений
+        # Применяем ту же логику проверки разрешений (без повторного запроса к БД)
         return self.has_permission(request, view)
@@ -1,12 +1,67 @@
+import hmac
+
 from django.contrib.auth import get_user_model
+from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
 from typing import Any, Dict
 from dj_rest_auth.registration.serializers import RegisterSerializer
 
-from ..models import Librarian, Member
+from ..models import CODE_VALIDATOR, Librarian, Member
 
 User = get_user_model()
 
+# Общий стиль полей пароля (скрытый ввод в Browsable API).
+# DRF копирует аргументы полей для каждого экземпляра сериализатора,
+# поэтому один словарь можно безопасно использовать во всех полях.
+PASSWORD_STYLE = {"input_type": "password"}
+
+
+def passwords_match(password, password_confirm):
+    """
+    Сравнивает пароль и подтверждение за постоянное время.
+    
+    Строки кодируются в UTF-8, так как hmac.compare_digest
+    принимает str только из ASCII-символов.
+    
+    Args:
+        password (str): Основной пароль
+        password_confirm (str): Подтверждение пароля
+        
+    Returns:
+        bool: True, если пароли совпадают
+    """
+    return hmac.compare_digest(password.encode("utf-8"), password_confirm.encode("utf-8"))
+
+
+# Ошибка при одновременной регистрации с одинаковыми username/email
+USER_CONFLICT_ERROR = {"user": "Пользователь с таким именем или email уже существует."}
+
+
+def code_field(model, field_name):
+    """
+    Создает поле только для чтения для генерируемого кода (staff_code, membership_code).
+    
+    DRF отбрасывает validators у полей только для чтения, поэтому поле
+    объявляется явно с общим CODE_VALIDATOR: валидатор не выполняется,
+    но drf-spectacular выводит из него pattern в схеме OpenAPI.
+    
+    Args:
+        model (Model): Модель с полем кода
+        field_name (str): Имя поля кода
+        
+    Returns:
+        CharField: Поле с label/help_text из модели
+    """
+    model_field = model._meta.get_field(field_name)
+    return serializers.CharField(
+        read_only=True,
+        label=model_field.verbose_name,
+        help_text=model_field.help_text,
+        validators=[CODE_VALIDATOR],
+    )
+
 
 class UserSerializer(serializers.ModelSerializer):
     """
@@ -54,7 +109,7 @@ class UserCreationSerializer(serializers.ModelSerializer):
     password = serializers.CharField(
         write_only=True,
         required=True,
-        style={'input_type': 'password'},
+        style=PASSWORD_STYLE,
         help_text="Пароль пользователя"
     )
     
@@ -62,7 +117,7 @@ class UserCreationSerializer(serializers.ModelSerializer):
     password2 = serializers.CharField(
         write_only=True,
         required=True,
-        style={'input_type': 'password'},
+        style=PASSWORD_STYLE,
         help_text="Подтверждение пароля (должно совпадать с основным)"
     )
 
@@ -78,7 +133,8 @@ class UserCreationSerializer(serializers.ModelSerializer):
         """
         Валидация данных пользователя.
         
-        Проверяет совпадение основного пароля и подтверждения.
+        Проверяет совпадение основного пароля и подтверждения
+        и применяет AUTH_PASSWORD_VALIDATORS.
         
         Args:
             data (dict): Данные для валидации
@@ -87,12 +143,23 @@ class UserCreationSerializer(serializers.ModelSerializer):
             dict: Валидированные данные
             
         Raises:
-            ValidationError: Если пароли не совпадают
+            ValidationError: Если пароли не совпадают или пароль слишком простой
+            
+        Note:
+            Валидаторам передается несохраненный экземпляр User, собранный
+            из входных данных: UserAttributeSimilarityValidator сравнивает
+            пароль с username/email без обращения к базе данных.
         """
-        if data['password'] != data['password2']:
+        if not passwords_match(data['password'], data['password2']):
             raise serializers.ValidationError({
                 "password": "Пароли не совпадают."
             })
+
+        user = User(username=data.get('username'), email=data.get('email'))
+        try:
+            validate_password(data['password'], user=user)
+        except DjangoValidationError as exc:
+            raise serializers.ValidationError({"password": list(exc.messages)})
         return data
 
     def create(self, validated_data):
@@ -129,7 +196,12 @@ class MemberSerializer(serializers.ModelSerializer):
     Note:
         Данный сериализатор предназначен только для чтения.
         Для создания читателей используйте CreateMemberSerializer.
+        Вложенный UserSerializer описывает схему OpenAPI, а ответ
+        строится напрямую в to_representation().
     """
+    # Код генерируется БД, формат описывается общим валидатором
+    membership_code = code_field(Member, "membership_code")
+
     # Вложенный сериализатор для отображения данных пользователя
     user = UserSerializer(read_only=True)
 
@@ -138,6 +210,23 @@ class MemberSerializer(serializers.ModelSerializer):
         fields = ("id", "membership_code", "user")
         read_only_fields = ("id", "membership_code")  # Код генерируется автоматически
 
+    def to_representation(self, instance):
+        """
+        Формирует ответ без обхода полей вложенного сериализатора.
+        
+        Args:
+            instance (Member): Читатель с предзагруженным пользователем
+            
+        Returns:
+            dict: Данные читателя в формате полей Meta.fields
+        """
+        user = instance.user
+        return {
+            "id": instance.id,
+            "membership_code": instance.membership_code,
+            "user": {"id": user.id, "username": user.username, "email": user.email},
+        }
+
 
 class CreateMemberSerializer(serializers.ModelSerializer):
     """
@@ -177,20 +266,25 @@ class CreateMemberSerializer(serializers.ModelSerializer):
             Member: Созданный читатель
             
         Note:
-            Код читательского билета генерируется автоматически
-            в формате MEM{id:05d} после создания записи.
+            Код читательского билета в формате MEM{id:05d} вычисляется
+            базой данных при INSERT (GeneratedField) и возвращается
+            через RETURNING без дополнительных запросов.
+            Нарушение уникальности username/email при гонке параллельных
+            запросов возвращается как ошибка валидации (400), а не 500.
         """
         # Извлекаем данные пользователя
         user_data = validated_data.pop("user")
         # Удаляем поле подтверждения пароля
         user_data.pop('password2', None)
-        # Создаем пользователя
-        user = User.objects.create_user(**user_data)
-        # Создаем читателя
-        member = Member.objects.create(user=user)
-        # Генерируем код читательского билета
-        member.membership_code = f"MEM{member.id:05d}"
-        member.save(update_fields=['membership_code'])
+        try:
+            with transaction.atomic():
+                # Создаем пользователя
+                user = User.objects.create_user(**user_data)
+                # Создаем читателя (код генерируется базой данных)
+                member = Member.objects.create(user=user)
+        except IntegrityError:
+            # Параллельный запрос успел создать пользователя с теми же данными
+            raise serializers.ValidationError(USER_CONFLICT_ERROR)
         return member
 
 
@@ -209,7 +303,12 @@ class LibrarianSerializer(serializers.ModelSerializer):
     Note:
         Данный сериализатор предназначен только для чтения.
         Для создания библиотекарей используйте CreateLibrarianSerializer.
+        Вложенный UserSerializer описывает схему OpenAPI, а ответ
+        строится напрямую в to_representation().
     """
+    # Код генерируется БД, формат описывается общим валидатором
+    staff_code = code_field(Librarian, "staff_code")
+
     # Вложенный сериализатор для отображения данных пользователя
     user = UserSerializer(read_only=True)
 
@@ -218,6 +317,23 @@ class LibrarianSerializer(serializers.ModelSerializer):
         fields = ("id", "staff_code", "user")
         read_only_fields = ("id", "staff_code")  # Код генерируется автоматически
 
+    def to_representation(self, instance):
+        """
+        Формирует ответ без обхода полей вложенного сериализатора.
+        
+        Args:
+            instance (Librarian): Библиотекарь с предзагруженным пользователем
+            
+        Returns:
+            dict: Данные библиотекаря в формате полей Meta.fields
+        """
+        user = instance.user
+        return {
+            "id": instance.id,
+            "staff_code": instance.staff_code,
+            "user": {"id": user.id, "username": user.username, "email": user.email},
+        }
+
 
 class CreateLibrarianSerializer(serializers.ModelSerializer):
     """
@@ -260,20 +376,25 @@ class CreateLibrarianSerializer(serializers.ModelSerializer):
             Librarian: Созданный библиотекарь
             
         Note:
-            Код сотрудника генерируется автоматически
-            в формате LIB{id:05d} после создания записи.
+            Код сотрудника в формате LIB{id:05d} вычисляется
+            базой данных при INSERT (GeneratedField) и возвращается
+            через RETURNING без дополнительных запросов.
+            Нарушение уникальности username/email при гонке параллельных
+            запросов возвращается как ошибка валидации (400), а не 500.
         """
         # Извлекаем данные пользователя
         user_data = validated_data.pop("user")
         # Удаляем поле подтверждения пароля
         user_data.pop('password2', None)
-        # Создаем пользователя
-        user = User.objects.create_user(**user_data)
-        # Создаем библиотекаря
-        librarian = Librarian.objects.create(user=user)
-        # Генерируем код сотрудника
-        librarian.staff_code = f"LIB{librarian.id:05d}"
-        librarian.save(update_fields=['staff_code'])
+        try:
+            with transaction.atomic():
+                # Создаем пользователя
+                user = User.objects.create_user(**user_data)
+                # Создаем библиотекаря (код генерируется базой данных)
+                librarian = Librarian.objects.create(user=user)
+        except IntegrityError:
+            # Параллельный запрос успел создать пользователя с теми же данными
+            raise serializers.ValidationError(USER_CONFLICT_ERROR)
         return librarian
 
 
@@ -305,7 +426,7 @@ class CustomRegisterSerializer(RegisterSerializer):
     password1 = serializers.CharField(
         write_only=True,
         required=False,
-        style={"input_type": "password"},
+        style=PASSWORD_STYLE,
         help_text="Альтернативное поле пароля (для совместимости)"
     )
     
@@ -313,7 +434,7 @@ class CustomRegisterSerializer(RegisterSerializer):
     password = serializers.CharField(
         write_only=True,
         required=True,
-        style={"input_type": "password"},
+        style=PASSWORD_STYLE,
         help_text="Пароль пользователя"
     )
     
@@ -321,7 +442,7 @@ class CustomRegisterSerializer(RegisterSerializer):
     password2 = serializers.CharField(
         write_only=True,
         required=True,
-        style={"input_type": "password"},
+        style=PASSWORD_STYLE,
         help_text="Подтверждение пароля"
     )
 
@@ -336,46 +457,27 @@ class CustomRegisterSerializer(RegisterSerializer):
             Dict[str, Any]: Валидированные данные
             
         Raises:
-            ValidationError: При несовпадении паролей или отсутствии обязательных полей
+            ValidationError: При несовпадении паролей
+            
+        Note:
+            Наличие полей password/password2 обеспечивается на уровне полей
+            (required=True), поэтому здесь проверяется только совпадение.
+            Родительский validate() не вызывается: он выполняет ту же
+            проверку совпадения password1/password2 повторно.
         """
         # Определяем основной пароль (может быть в поле password или password1)
         password = attrs.get("password") or attrs.get("password1")
         password_confirm = attrs.get("password2")
 
-        # Проверяем наличие обязательных полей
-        if not password or not password_confirm:
-            raise serializers.ValidationError({
-                "password": "Пароль и подтверждение обязательны."
-            })
-
         # Проверяем совпадение паролей
-        if password != password_confirm:
+        if not passwords_match(password, password_confirm):
             raise serializers.ValidationError({
                 "password": "Пароли не совпадают."
             })
 
-        # Устанавливаем стандартные поля для dj-rest-auth
+        # Устанавливаем стандартные поля для dj-rest-auth: родительский
+        # get_cleaned_data() берет пароль из password1
         attrs["password1"] = password
-        attrs["password2"] = password_confirm
-
-        # Вызываем родительскую валидацию
-        return super().validate(attrs)
+        attrs["password"] = password
+        return attrs
 
-    def get_cleaned_data(self):
-        """
-        Подготовка очищенных данных для создания пользователя.
-        
-        Обеспечивает совместимость с базовым RegisterSerializer
-        и правильную передачу пароля в систему создания пользователя.
-        
-        Returns:
-            Dict[str, Any]: Очищенные данные для создания пользователя
-        """
-        # Получаем базовые очищенные данные
-        cleaned = super().get_cleaned_data()
-        
-        # Если password1 не установлен, используем password
-        if not cleaned.get("password1") and self.validated_data.get("password"):
-            cleaned["password1"] = self.validated_data.get("password")
-            
-        return cleaned
@@ -1,5 +1,6 @@
 from django.contrib.auth import get_user_model
 from django.db import transaction
+from django.db.models import Count
 
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.permissions import IsAdminUser
@@ -7,6 +8,7 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework import status
 
+from core.pagination import IdCursorPagination
 from ..models import Librarian, Member
 from .permissions import IsAdminOrLibrarian
 from .serializers import (
@@ -33,6 +35,7 @@ class MemberViewset(ModelViewSet):
         - Автоматическая генерация кода читательского билета
         - Каскадное удаление связанного пользователя
         - Оптимизированные запросы с select_related
+        - Курсорная пагинация списка (IdCursorPagination)
         - Различные сериализаторы для создания и отображения
         
     Endpoints:
@@ -46,8 +49,33 @@ class MemberViewset(ModelViewSet):
         При удалении читателя также удаляется связанный пользователь.
     """
     # Оптимизированный queryset с предзагрузкой связанных данных
-    queryset = Member.objects.select_related("user").all()
+    # (only() ограничивает SELECT полями, которые отдает сериализатор)
+    queryset = (
+        Member.objects
+        .select_related("user")
+        .only("id", "membership_code", "user__id", "user__username", "user__email")
+    )
     permission_classes = [IsAdminOrLibrarian]
+    # Курсорная пагинация без COUNT(*) и OFFSET
+    pagination_class = IdCursorPagination
+
+    def get_queryset(self):
+        """
+        Возвращает queryset читателей с учетом текущего действия.
+        
+        Returns:
+            QuerySet: Для действия borrowings - с аннотацией
+                     active_borrowings_count (подсчет в том же запросе),
+                     для остальных действий - базовый queryset
+        """
+        queryset = super().get_queryset()
+        if self.action == "borrowings":
+            # Считаем активные выдачи через JOIN + GROUP BY вместо отдельного COUNT
+            # (возвращенные выдачи удаляются, поэтому активны все записи)
+            queryset = queryset.annotate(
+                active_borrowings_count=Count("borrowed_books")
+            )
+        return queryset
 
     def get_serializer_class(self):
         """
@@ -86,9 +114,12 @@ class MemberViewset(ModelViewSet):
         Note:
             Сначала удаляется связанный пользователь,
             что автоматически удаляет читателя через CASCADE.
+            Пользователь удаляется через User(pk=user_id).delete(): в
+            отличие от QuerySet.delete() строка core_user (с хешем пароля)
+            не выбирается перед удалением.
         """
         # Удаляем связанного пользователя (читатель удалится автоматически)
-        instance.user.delete()
+        User(pk=instance.user_id).delete()
         
     @action(detail=True, methods=['get'])
     def borrowings(self, request, pk=None):
@@ -100,14 +131,17 @@ class MemberViewset(ModelViewSet):
             pk: ID читателя
             
         Returns:
-            Response: Список активных выдач читателя
+            Response: Количество активных выдач читателя
+            
+        Note:
+            Количество вычисляется аннотацией в get_queryset,
+            поэтому действие выполняет один запрос к базе данных.
         """
         member = self.get_object()
-        borrowings = member.borrowed_books.filter(due_date__isnull=False)
         # Здесь можно добавить сериализацию borrowings
         return Response({
             'member': member.id,
-            'active_borrowings_count': borrowings.count()
+            'active_borrowings_count': member.active_borrowings_count
         })
 
 
@@ -125,6 +159,7 @@ class LibrarianViewset(ModelViewSet):
         - Автоматическая генерация кода сотрудника
         - Каскадное удаление связанного пользователя
         - Оптимизированные запросы с select_related
+        - Курсорная пагинация списка (IdCursorPagination)
         - Различные сериализаторы для создания и отображения
         
     Endpoints:
@@ -139,8 +174,15 @@ class LibrarianViewset(ModelViewSet):
         доступная только администраторам.
     """
     # Оптимизированный queryset с предзагрузкой связанных данных
-    queryset = Librarian.objects.select_related("user").all()
+    # (only() ограничивает SELECT полями, которые отдает сериализатор)
+    queryset = (
+        Librarian.objects
+        .select_related("user")
+        .only("id", "staff_code", "user__id", "user__username", "user__email")
+    )
     permission_classes = [IsAdminUser]
+    # Курсорная пагинация без COUNT(*) и OFFSET
+    pagination_class = IdCursorPagination
 
     def get_serializer_class(self):
         """
@@ -179,6 +221,9 @@ class LibrarianViewset(ModelViewSet):
         Note:
             Сначала удаляется связанный пользователь,
             что автоматически удаляет библиотекаря через CASCADE.
+            Пользователь удаляется через User(pk=user_id).delete(): в
+            отличие от QuerySet.delete() строка core_user (с хешем пароля)
+            не выбирается перед удалением.
         """
         # Удаляем связанного пользователя (библиотекарь удалится автоматически)
-        instance.user.delete()
+        User(pk=instance.user_id).delete()
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.6 on 2026-10-14 17:55
+
+import django.core.validators
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """
+    Переводит staff_code и membership_code на вычисляемые столбцы.
+    
+    Изменение обычного столбца на GeneratedField не поддерживается
+    AlterField, поэтому столбцы (и индексы по ним) пересоздаются.
+    Значения вычисляются базой данных из id в формате {prefix}{id:05d}.
+    """
+
+    dependencies = [
+        ('accounts', '0003_alter_librarian_user_alter_member_user'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='librarian',
+            name='accounts_li_staff_c_7b7f05_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='member',
+            name='accounts_me_members_b879c2_idx',
+        ),
+        migrations.RemoveField(
+            model_name='librarian',
+            name='staff_code',
+        ),
+        migrations.RemoveField(
+            model_name='member',
+            name='membership_code',
+        ),
+        migrations.AddField(
+            model_name='librarian',
+            name='staff_code',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.text.Concat(models.Value('LIB'), django.db.models.functions.text.LPad(django.db.models.functions.comparison.Cast('id', models.CharField()), 5, models.Value('0'))), help_text='Уникальный код сотрудника (например: LIB00001)', output_field=models.CharField(max_length=8), unique=True, validators=[django.core.validators.RegexValidator(message='Код должен быть в формате: 3 заглавные буквы + 5 цифр', regex='^[A-Z]{3}\\d{5}$')], verbose_name='Код сотрудника'),
+        ),
+        migrations.AddField(
+            model_name='member',
+            name='membership_code',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.text.Concat(models.Value('MEM'), django.db.models.functions.text.LPad(django.db.models.functions.comparison.Cast('id', models.CharField()), 5, models.Value('0'))), help_text='Уникальный код читательского билета (например: MEM00001)', output_field=models.CharField(max_length=8), unique=True, validators=[django.core.validators.RegexValidator(message='Код должен быть в формате: 3 заглавные буквы + 5 цифр', regex='^[A-Z]{3}\\d{5}$')], verbose_name='Код читателя'),
+        ),
+        migrations.AddIndex(
+            model_name='librarian',
+            index=models.Index(fields=['staff_code'], name='accounts_li_staff_c_7b7f05_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['membership_code'], name='accounts_me_members_b879c2_idx'),
+        ),
+    ]
@@ -1,7 +1,38 @@
 from django.db import models
+from django.db.models.functions import Cast, Concat, LPad
 from django.conf import settings
 from django.core.validators import RegexValidator
 
+# Формат кодов сотрудника и читателя: 3 заглавные буквы + 5 цифр.
+# Один экземпляр валидатора на обе модели: RegexValidator компилирует
+# шаблон лениво при первом вызове, поэтому компиляция происходит один раз
+# на процесс. Шаблон передается строкой, чтобы состояние миграций не менялось.
+# Коды вычисляются БД (GeneratedField), а Model.clean_fields пропускает
+# генерируемые поля, поэтому при full_clean()/bulk_create() регулярное
+# выражение в Python не выполняется: формат гарантирует выражение
+# _code_expression, а валидатор описывает формат для API-схемы.
+CODE_PATTERN = r'^[A-Z]{3}\d{5}$'
+CODE_VALIDATOR = RegexValidator(
+    regex=CODE_PATTERN,
+    message='Код должен быть в формате: 3 заглавные буквы + 5 цифр'
+)
+
+
+def _code_expression(prefix):
+    """
+    Возвращает выражение БД для кода в формате {prefix}{id:05d}.
+    
+    Args:
+        prefix (str): Префикс кода из 3 заглавных букв (например: LIB)
+        
+    Returns:
+        Concat: Выражение для GeneratedField, вычисляемое базой данных
+    """
+    return Concat(
+        models.Value(prefix),
+        LPad(Cast("id", models.CharField()), 5, models.Value("0")),
+    )
+
 
 class Librarian(models.Model):
     """
@@ -12,32 +43,31 @@ class Librarian(models.Model):
     связан с базовой моделью User и имеет уникальный код сотрудника.
     
     Attributes:
-        user (ForeignKey): Связь с базовой моделью пользователя (User)
-        staff_code (CharField): Уникальный код сотрудника для идентификации
+        user (OneToOneField): Связь с базовой моделью пользователя (User)
+        staff_code (GeneratedField): Уникальный код сотрудника для идентификации
     
     Methods:
         __str__(): Возвращает строковое представление библиотекаря
     """
-    # Связь с базовой моделью пользователя (один к одному)
+    # Связь с базовой моделью пользователя (один к одному,
+    # уникальный индекс по user_id создается автоматически)
     user = models.OneToOneField(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
+        related_name="librarian",
         verbose_name="Пользователь",
         help_text="Связанный пользователь системы"
     )
     
-    # Код сотрудника с валидацией формата
-    staff_code = models.CharField(
-        max_length=8,
+    # Код сотрудника, вычисляемый базой данных при INSERT (LIB{id:05d})
+    staff_code = models.GeneratedField(
+        expression=_code_expression("LIB"),
+        output_field=models.CharField(max_length=8),
+        db_persist=True,
         unique=True,
         verbose_name="Код сотрудника",
         help_text="Уникальный код сотрудника (например: LIB00001)",
-        validators=[
-            RegexValidator(
-                regex=r'^[A-Z]{3}\d{5}$',
-                message='Код должен быть в формате: 3 заглавные буквы + 5 цифр'
-            )
-        ]
+        validators=[CODE_VALIDATOR]
     )
 
     def __str__(self):
@@ -68,32 +98,31 @@ class Member(models.Model):
     
     Attributes:
         user (OneToOneField): Связь с базовой моделью пользователя
-        membership_code (CharField): Уникальный код читательского билета
+        membership_code (GeneratedField): Уникальный код читательского билета
     
     Methods:
         __str__(): Возвращает строковое представление читателя
         get_active_borrowings(): Возвращает активные выдачи читателя
     """
-    # Связь с базовой моделью пользователя (один к одному)
+    # Связь с базовой моделью пользователя (один к одному,
+    # уникальный индекс по user_id создается автоматически)
     user = models.OneToOneField(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
+        related_name="member",
         verbose_name="Пользователь",
         help_text="Связанный пользователь системы"
     )
     
-    # Код читательского билета с валидацией
-    membership_code = models.CharField(
-        max_length=8,
+    # Код читательского билета, вычисляемый базой данных при INSERT (MEM{id:05d})
+    membership_code = models.GeneratedField(
+        expression=_code_expression("MEM"),
+        output_field=models.CharField(max_length=8),
+        db_persist=True,
         unique=True,
         verbose_name="Код читателя",
         help_text="Уникальный код читательского билета (например: MEM00001)",
-        validators=[
-            RegexValidator(
-                regex=r'^[A-Z]{3}\d{5}$',
-                message='Код должен быть в формате: 3 заглавные буквы + 5 цифр'
-            )
-        ]
+        validators=[CODE_VALIDATOR]
     )
 
     def __str__(self):
@@ -111,8 +140,14 @@ class Member(models.Model):
         
         Returns:
             QuerySet: Набор активных выдач (BorrowedBook без даты возврата)
+            
+        Note:
+            При возврате книги запись BorrowedBook удаляется, поэтому
+            каждая существующая выдача читателя активна (включая просроченные).
+            Метод использует all(), чтобы при prefetch_related("borrowed_books")
+            результат брался из кеша без запроса к базе данных.
         """
-        return self.borrowedbook_set.filter(due_date__isnull=False)
+        return self.borrowed_books.all()
     
     class Meta:
         verbose_name = "Читатель"
@@ -0,0 +1,29 @@
+from functools import partial
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .api.permissions import get_librarian_cache_key
+from .models import Librarian
+
+
+@receiver(post_save, sender=Librarian)
+@receiver(post_delete, sender=Librarian)
+def invalidate_librarian_cache(sender, instance, **kwargs):
+    """
+    Сбрасывает кеш статуса библиотекаря при создании/удалении Librarian.
+    
+    Args:
+        sender: Модель Librarian
+        instance (Librarian): Сохраненный или удаленный библиотекарь
+        
+    Note:
+        Ключ удаляется сразу и повторно после COMMIT: запрос, пришедший
+        до COMMIT, ещё видит старую строку Librarian и мог заново
+        закешировать прежний статус на LIBRARIAN_CACHE_TIMEOUT.
+    """
+    key = get_librarian_cache_key(instance.user_id)
+    cache.delete(key)
+    transaction.on_commit(partial(cache.delete, key))
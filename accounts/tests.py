@@ -1,7 +1,15 @@
+from datetime import date, timedelta
+
 from rest_framework.test import APITestCase
+from django.core.cache import cache
 from django.urls import reverse
 from rest_framework import status
 from core.models import User
+from core.testing import CacheClearMixin
+from accounts.api.permissions import get_librarian_cache_key
+from accounts.models import Librarian, Member
+from library.models import Author, Book, BookItem
+from borrowing.models import BorrowedBook
 
 
 class AuthTests(APITestCase):
@@ -24,6 +32,8 @@ class AuthTests(APITestCase):
         
         self.assertEqual(User.objects.count(), 1)
         self.assertEqual(User.objects.get().username, 'testuser')
+        # Пароль должен быть сохранен из поля password
+        self.assertTrue(User.objects.get().check_password('strong_password123'))
 
     def test_registration_fails_on_password_mismatch(self):
         """
@@ -66,3 +76,158 @@ class AuthTests(APITestCase):
         # Проверяем, что в ответе есть токены access и refresh
         self.assertIn('access', response.data)
         self.assertIn('refresh', response.data)
+
+
+class MemberApiTests(CacheClearMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_user(username="admin", email="admin@example.com", password="Admin_pass_123!")
+        self.admin.is_staff = True
+        self.admin.save(update_fields=["is_staff"])
+        self.member_user = User.objects.create_user(username="mem", email="mem@example.com", password="Mem_pass_123!")
+        self.member = Member.objects.create(user=self.member_user)
+
+        author = Author.objects.create(name="Author One")
+        book = Book.objects.create(title="Book One", isbn="ISBN-0001", subject="Test", page_counts=100)
+        book.author.add(author)
+        for i in range(2):
+            item = BookItem.objects.create(
+                book=book,
+                barcode=f"BAR000{i}",
+                status=BookItem.STATUS_BORROWED,
+                publication_date=date(2020, 1, 1),
+            )
+            BorrowedBook.objects.create(
+                book_item=item,
+                borrower=self.member,
+                due_date=date.today() + timedelta(days=7),
+            )
+
+    def test_borrowings_count_in_single_query(self):
+        """
+        Тестирует, что количество активных выдач считается одним запросом.
+        """
+        self.client.force_authenticate(user=self.admin)
+        url = f"/accounts/api/accounts/members/{self.member.id}/borrowings/"
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["active_borrowings_count"], 2)
+
+    def test_get_active_borrowings_uses_prefetch(self):
+        """
+        Тестирует, что активные выдачи берутся из предзагруженного кеша.
+        """
+        member = Member.objects.prefetch_related("borrowed_books").get(pk=self.member.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(len(member.get_active_borrowings()), 2)
+
+    def test_create_member_generates_code(self):
+        """
+        Тестирует создание читателя с автоматической генерацией кода.
+        """
+        self.client.force_authenticate(user=self.admin)
+        payload = {
+            "user": {
+                "username": "newmem",
+                "email": "newmem@example.com",
+                "password": "Newmem_pass_123!",
+                "password2": "Newmem_pass_123!",
+            }
+        }
+        response = self.client.post("/accounts/api/accounts/members/", payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        member = Member.objects.get(user__username="newmem")
+        self.assertEqual(member.membership_code, f"MEM{member.id:05d}")
+
+    def test_delete_member_deletes_user(self):
+        """
+        Тестирует, что удаление читателя удаляет связанного пользователя.
+        """
+        self.client.force_authenticate(user=self.admin)
+        # Читатель из queryset представления, SAVEPOINT/RELEASE, выборка
+        # связей пользователя для каскада и DELETE; строка core_user
+        # перед удалением не выбирается
+        with self.assertNumQueries(13):
+            response = self.client.delete(f"/accounts/api/accounts/members/{self.member.id}/")
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(User.objects.filter(pk=self.member_user.pk).exists())
+        self.assertFalse(Member.objects.filter(pk=self.member.pk).exists())
+
+    def test_retrieve_member_representation(self):
+        """
+        Тестирует формат ответа с данными читателя и пользователя.
+        """
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get(f"/accounts/api/accounts/members/{self.member.id}/")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {
+            "id": self.member.id,
+            "membership_code": f"MEM{self.member.id:05d}",
+            "user": {"id": self.member_user.id, "username": "mem", "email": "mem@example.com"},
+        })
+
+    def test_librarian_permission_cache_reset_on_delete(self):
+        """
+        Тестирует сброс кеша прав после удаления записи библиотекаря.
+        """
+        librarian_user = User.objects.create_user(username="lib", email="lib@example.com", password="Lib_pass_123!")
+        librarian = Librarian.objects.create(user=librarian_user)
+        self.client.force_authenticate(user=librarian_user)
+
+        response = self.client.get("/accounts/api/accounts/members/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        librarian.delete()
+        response = self.client.get("/accounts/api/accounts/members/")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_librarian_permission_cache_reset_after_commit(self):
+        """
+        Тестирует повторный сброс кеша прав после COMMIT удаления.
+        """
+        librarian_user = User.objects.create_user(username="lib", email="lib@example.com", password="Lib_pass_123!")
+        librarian = Librarian.objects.create(user=librarian_user)
+        self.client.force_authenticate(user=librarian_user)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            librarian.delete()
+            # Запрос до COMMIT кеширует статус, прочитанный до удаления
+            cache.set(get_librarian_cache_key(librarian_user.pk), True)
+        for callback in callbacks:
+            callback()
+        response = self.client.get("/accounts/api/accounts/members/")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_list_members_cursor_paginated(self):
+        """
+        Тестирует курсорную пагинацию списка читателей.
+        """
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get("/accounts/api/accounts/members/")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("next", response.data)
+        self.assertEqual([m["id"] for m in response.data["results"]], [self.member.id])
+
+    def test_create_member_rejects_weak_password(self):
+        """
+        Тестирует, что валидаторы Django отклоняют простой пароль.
+        """
+        self.client.force_authenticate(user=self.admin)
+        payload = {
+            "user": {
+                "username": "weakmem",
+                "email": "weakmem@example.com",
+                "password": "123",
+                "password2": "123",
+            }
+        }
+        response = self.client.post("/accounts/api/accounts/members/", payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(User.objects.filter(username="weakmem").exists())
@@ -1,6 +1,18 @@
 from django.contrib import admin
 from .models import BorrowedBook
 
-# Регистрируем модель BorrowedBook
-admin.site.register(BorrowedBook)
 
+@admin.register(BorrowedBook)
+class BorrowedBookAdmin(admin.ModelAdmin):
+    """
+    Админка выдач книг.
+    
+    Список выдач выводит __str__ для каждой строки, поэтому queryset
+    сразу предзагружает книгу и пользователя читателя (без N+1).
+    """
+
+    # Просроченные в начале
+    ordering = ("due_date", "borrowed_date")
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_display()
@@ -0,0 +1,14 @@
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class BookItemUnavailable(APIException):
+    """
+    Экземпляр книги уже выдан или недоступен на момент записи.
+    
+    Возникает, когда экземпляр прошёл валидацию, но к моменту
+    условного UPDATE его статус успел измениться (параллельная выдача).
+    """
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Данный экземпляр книги недоступен для выдачи."
+    default_code = "book_item_unavailable"
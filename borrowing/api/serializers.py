@@ -1,9 +1,37 @@
+from django.db import transaction
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 from datetime import date, timedelta
 
 from library.api.serializers import BookItemSerializer
+from library.cache import invalidate_library_api_cache
+from library.models import BookItem
 from accounts.api.serializers import MemberSerializer
 from ..models import BorrowedBook
+from .exceptions import BookItemUnavailable
+
+
+@extend_schema_field(OpenApiTypes.INT)
+class DurationDaysField(serializers.ReadOnlyField):
+    """
+    Поле только для чтения, отображающее timedelta как количество дней.
+    
+    Используется для аннотаций DurationField (например, days_overdue_db).
+    Значение None сериализуется как null без вызова to_representation.
+    """
+
+    def to_representation(self, value):
+        """
+        Преобразует интервал в целое количество дней.
+        
+        Args:
+            value (timedelta): Интервал из аннотации queryset
+            
+        Returns:
+            int: Количество полных дней
+        """
+        return value.days
 
 
 class BorrowedBookSerializer(serializers.ModelSerializer):
@@ -22,7 +50,8 @@ class BorrowedBookSerializer(serializers.ModelSerializer):
         due_date (date): Планируемая дата возврата
         
     Additional Info:
-        - Автоматически отображает статус просрочки
+        - Автоматически отображает статус просрочки (is_overdue, days_overdue
+          из аннотаций is_overdue_db/days_overdue_db) и штраф (fine_amount)
         - Включает полную информацию о книге и авторах
         - Содержит данные о читателе
         
@@ -35,41 +64,59 @@ class BorrowedBookSerializer(serializers.ModelSerializer):
     # Вложенный сериализатор для отображения информации о читателе
     borrower = MemberSerializer(read_only=True)
     
-    # Дополнительные поля для удобства
-    is_overdue = serializers.SerializerMethodField()
-    days_overdue = serializers.SerializerMethodField()
+    # Дополнительные поля для удобства (вычисляются аннотациями queryset
+    # в BorrowedBookViewset.get_queryset)
+    is_overdue = serializers.BooleanField(source="is_overdue_db", read_only=True)
+    days_overdue = DurationDaysField(source="days_overdue_db", allow_null=True)
+    fine_amount = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
 
     class Meta:
         model = BorrowedBook
         fields = (
             "id", "book_item", "borrower", "borrowed_date", 
-            "due_date", "is_overdue", "days_overdue"
+            "due_date", "is_overdue", "days_overdue", "fine_amount"
         )
         read_only_fields = ("id", "borrowed_date")
+
+
+class BorrowedBookListSerializer(serializers.ModelSerializer):
+    """
+    Облегчённый сериализатор выдачи для списочных представлений.
     
-    def get_is_overdue(self, obj):
-        """
-        Определяет, просрочена ли выдача.
-        
-        Args:
-            obj (BorrowedBook): Экземпляр выдачи
-            
-        Returns:
-            bool: True, если выдача просрочена
-        """
-        return obj.is_overdue()
+    Вместо вложенных BookItemSerializer и MemberSerializer выводит
+    только ID связанных объектов, название книги и код читателя.
     
-    def get_days_overdue(self, obj):
-        """
-        Возвращает количество дней просрочки.
+    Fields:
+        id (int): Уникальный идентификатор выдачи
+        book_item (int): ID экземпляра книги
+        book_item_title (str): Название выданной книги
+        borrower (int): ID читателя
+        borrower_code (str): Членский код читателя
+        borrowed_date (date): Дата выдачи книги
+        due_date (date): Планируемая дата возврата
+        is_overdue (bool): Просрочена ли выдача
+        days_overdue (int): Количество дней просрочки или null
+        fine_amount (Decimal): Штраф за просрочку
         
-        Args:
-            obj (BorrowedBook): Экземпляр выдачи
-            
-        Returns:
-            int or None: Количество дней просрочки или None
-        """
-        return obj.how_many_days_past_from_due_date()
+    Note:
+        Используется в действиях list, overdue и due_soon.
+        Полная информация о выдаче доступна через BorrowedBookSerializer.
+    """
+    book_item_title = serializers.CharField(source="book_item.book.title", read_only=True)
+    borrower_code = serializers.CharField(source="borrower.membership_code", read_only=True)
+
+    # Статус просрочки из аннотаций queryset
+    is_overdue = serializers.BooleanField(source="is_overdue_db", read_only=True)
+    days_overdue = DurationDaysField(source="days_overdue_db", allow_null=True)
+    fine_amount = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
+
+    class Meta:
+        model = BorrowedBook
+        fields = (
+            "id", "book_item", "book_item_title", "borrower", "borrower_code",
+            "borrowed_date", "due_date", "is_overdue", "days_overdue", "fine_amount"
+        )
+        read_only_fields = fields
 
 
 class BorrowedBookCreateSerializer(serializers.ModelSerializer):
@@ -138,13 +185,14 @@ class BorrowedBookCreateSerializer(serializers.ModelSerializer):
         Raises:
             ValidationError: Если дата некорректна
         """
-        if value <= date.today():
+        today = date.today()
+        if value <= today:
             raise serializers.ValidationError(
                 "Дата возврата должна быть в будущем."
             )
         
         # Проверяем, что дата возврата не слишком далеко в будущем (например, не более 6 месяцев)
-        max_date = date.today() + timedelta(days=180)
+        max_date = today + timedelta(days=180)
         if value > max_date:
             raise serializers.ValidationError(
                 "Дата возврата не может быть более чем через 6 месяцев."
@@ -156,7 +204,7 @@ class BorrowedBookCreateSerializer(serializers.ModelSerializer):
         """
         Создание новой выдачи книги.
         
-        Автоматически изменяет статус экземпляра книги на "Выдана"
+        Атомарно изменяет статус экземпляра книги на "Выдана"
         и создает запись о выдаче.
         
         Args:
@@ -164,12 +212,27 @@ class BorrowedBookCreateSerializer(serializers.ModelSerializer):
             
         Returns:
             BorrowedBook: Созданная выдача
+            
+        Raises:
+            BookItemUnavailable: Если экземпляр был выдан параллельным запросом (409)
+            
+        Note:
+            Должен вызываться внутри транзакции (perform_create),
+            чтобы смена статуса откатилась при ошибке создания выдачи.
         """
-        # Создаем выдачу
-        borrowed_book = super().create(validated_data)
+        # Занимаем экземпляр условным UPDATE: статус меняется, только если
+        # экземпляр всё ещё доступен, поэтому две параллельные выдачи
+        # одного экземпляра не пройдут обе
+        book_item = validated_data["book_item"]
+        updated = BookItem.objects.filter(
+            pk=book_item.pk, status=BookItem.STATUS_AVAILABLE
+        ).update(status=BookItem.STATUS_BORROWED)
+        if not updated:
+            raise BookItemUnavailable()
+        book_item.status = BookItem.STATUS_BORROWED
+        # UPDATE не отправляет сигналы: сбрасываем кеш каталога явно,
+        # после COMMIT транзакции perform_create
+        transaction.on_commit(invalidate_library_api_cache)
         
-        # Изменяем статус экземпляра книги на "Выдана"
-        book_item = borrowed_book.book_item
-        book_item.change_status(book_item.STATUS_BORROWED)
-        
-        return borrowed_book
+        # Создаем выдачу
+        return super().create(validated_data)
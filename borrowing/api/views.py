@@ -1,18 +1,25 @@
 
 from django.db import transaction
+from django_filters.rest_framework import DjangoFilterBackend
+from django.db.models import BooleanField, Case, DurationField, ExpressionWrapper, F, Prefetch, Value, When
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.viewsets import GenericViewSet
-from rest_framework import mixins, status
+from drf_spectacular.utils import extend_schema, inline_serializer
+from rest_framework import mixins, serializers, status
 from rest_framework.decorators import action
+from rest_framework.filters import OrderingFilter
 from rest_framework.response import Response
-from rest_framework_simplejwt.authentication import JWTAuthentication
 from django.utils import timezone
-from datetime import date
+from datetime import date, timedelta
+from functools import cached_property
 
 from accounts.api.permissions import IsAdminOrLibrarian
-from library.models import BookItem
-from .serializers import BorrowedBookSerializer, BorrowedBookCreateSerializer
-from ..models import BorrowedBook
+from core.authentication import CachedJWTAuthentication
+from core.pagination import DueDateCursorPagination
+from library.cache import invalidate_library_api_cache
+from library.models import Author, BookItem
+from .serializers import BorrowedBookSerializer, BorrowedBookListSerializer, BorrowedBookCreateSerializer
+from ..models import DEFAULT_DAILY_FINE, BorrowedBook
 
 
 class BorrowedBookViewset(
@@ -34,6 +41,7 @@ class BorrowedBookViewset(
         - Автоматическое изменение статуса экземпляра при выдаче/возврате
         - Оптимизированные запросы с select_related и prefetch_related
         - Фильтрация по просроченным выдачам
+        - Курсорная пагинация списков по дате возврата
         
     Supported Actions:
         - CREATE: Выдача книги читателю
@@ -49,6 +57,7 @@ class BorrowedBookViewset(
         - GET /api/books/ - Список всех выдач
         - POST /api/books/ - Создание новой выдачи
         - GET /api/books/{id}/ - Детали конкретной выдачи
+        - GET /api/books/overdue_count/ - Количество просроченных выдач
         - DELETE /api/books/{id}/ - Возврат книги
         
     Permissions:
@@ -59,29 +68,113 @@ class BorrowedBookViewset(
         При удалении выдачи (возврате книги) статус экземпляра
         автоматически изменяется на "Доступна".
     """
-    # Оптимизированный queryset с предзагрузкой связанных данных
+    # Оптимизированный queryset с предзагрузкой связанных данных.
+    # Загружаются только колонки, которые выводят вложенные сериализаторы
+    # (BookItemSerializer и MemberSerializer): без пароля, дат входа и т.п.
     queryset = (
         BorrowedBook.objects
         .select_related("book_item__book", "borrower__user")
-        .prefetch_related("book_item__book__author")
-        .all()
+        .prefetch_related(
+            Prefetch("book_item__book__author", queryset=Author.objects.only("id", "name", "description").order_by("name"))
+        )
+        .only(
+            "id", "borrowed_date", "due_date",
+            "book_item__id", "book_item__barcode", "book_item__status", "book_item__publication_date",
+            "book_item__book__id", "book_item__book__title", "book_item__book__isbn",
+            "book_item__book__subject", "book_item__book__page_counts",
+            "borrower__id", "borrower__membership_code",
+            "borrower__user__id", "borrower__user__username", "borrower__user__email",
+        )
     )
     
     # Настройки аутентификации и прав доступа
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated, IsAdminOrLibrarian]
 
+    # Курсорная пагинация без COUNT(*) для list, overdue и due_soon
+    pagination_class = DueDateCursorPagination
+
+    # Явная сортировка списков (в модели сортировка по умолчанию не задана):
+    # ближайший срок возврата первым, ?ordering= меняет порядок
+    filter_backends = [DjangoFilterBackend, OrderingFilter]
+    ordering_fields = ("due_date", "borrowed_date", "id")
+    ordering = ("due_date", "id")
+
+    # Действия, которые отдают списки выдач в плоском виде
+    LIST_ACTIONS = ("list", "overdue", "due_soon")
+
+    # Сериализаторы по действиям (остальные используют BorrowedBookSerializer)
+    serializer_action_classes = {
+        "create": BorrowedBookCreateSerializer,
+        **{action_name: BorrowedBookListSerializer for action_name in LIST_ACTIONS},
+    }
+
+    @cached_property
+    def today(self):
+        """
+        Текущая дата, вычисленная один раз на запрос.
+        
+        ViewSet создаётся заново для каждого запроса, поэтому значение
+        не устаревает между запросами (в отличие от кеша на уровне модуля).
+        
+        Returns:
+            date: Текущая дата
+        """
+        return date.today()
+
+    def get_queryset(self):
+        """
+        Возвращает queryset выдач со статусом просрочки, вычисленным в SQL.
+        
+        Returns:
+            QuerySet: Выдачи с аннотациями is_overdue_db (bool),
+                     days_overdue_db (timedelta или None, если срок не наступил)
+                     и fine_amount (Decimal, штраф за просрочку).
+                     Для списочных действий загружаются только поля
+                     BorrowedBookListSerializer.
+        """
+        queryset = super().get_queryset()
+        if self.action in self.LIST_ACTIONS:
+            # Плоскому сериализатору не нужны авторы и данные пользователя
+            queryset = (
+                queryset
+                .select_related(None)
+                .select_related("book_item__book", "borrower")
+                .prefetch_related(None)
+                .only(
+                    "id", "borrowed_date", "due_date",
+                    "book_item__id", "book_item__book__id", "book_item__book__title",
+                    "borrower__id", "borrower__membership_code",
+                )
+            )
+
+        today = self.today
+        return queryset.with_fines(today=today).annotate(
+            is_overdue_db=Case(
+                When(due_date__lt=today, then=Value(True)),
+                default=Value(False),
+                output_field=BooleanField(),
+            ),
+            days_overdue_db=Case(
+                When(
+                    due_date__lte=today,
+                    then=ExpressionWrapper(Value(today) - F("due_date"), output_field=DurationField()),
+                ),
+                default=None,
+                output_field=DurationField(),
+            ),
+        )
+
     def get_serializer_class(self):
         """
         Возвращает соответствующий сериализатор в зависимости от действия.
         
         Returns:
             Serializer: BorrowedBookCreateSerializer для создания,
+                       BorrowedBookListSerializer для списков,
                        BorrowedBookSerializer для остальных операций
         """
-        if self.action == "create":
-            return BorrowedBookCreateSerializer
-        return BorrowedBookSerializer
+        return self.serializer_action_classes.get(self.action, BorrowedBookSerializer)
 
     @transaction.atomic
     def perform_create(self, serializer):
@@ -110,14 +203,17 @@ class BorrowedBookViewset(
             При возврате статус экземпляра меняется на "Доступна"
             и запись выдачи удаляется.
         """
-        # Получаем экземпляр книги до удаления записи выдачи
-        book_item = instance.book_item
+        # Запоминаем экземпляр книги до удаления записи выдачи
+        book_item_id = instance.book_item_id
         
         # Удаляем запись выдачи
         super().perform_destroy(instance)
         
-        # Возвращаем статус экземпляра в "Доступна"
-        book_item.change_status(BookItem.STATUS_AVAILABLE)
+        # Возвращаем статус экземпляра в "Доступна" одним UPDATE по PK
+        BookItem.objects.filter(pk=book_item_id).update(status=BookItem.STATUS_AVAILABLE)
+        # Кеш каталога сбрасывается после COMMIT, когда новый статус
+        # виден другим запросам
+        transaction.on_commit(invalidate_library_api_cache)
 
     @action(detail=False, methods=['get'])
     def overdue(self, request):
@@ -128,18 +224,38 @@ class BorrowedBookViewset(
             request: HTTP запрос
             
         Returns:
-            Response: Список просроченных выдач с дополнительной информацией
+            Response: Страница просроченных выдач (next, previous, results)
+            
+        Note:
+            Предназначено для списков в интерфейсе. Если нужно только
+            количество, используйте overdue_count.
         """
-        # Фильтруем просроченные выдачи
+        # Фильтруем просроченные выдачи и отдаём их постранично
         overdue_borrowings = self.get_queryset().filter(
-            due_date__lt=date.today()
+            due_date__lt=self.today
         )
         
-        serializer = self.get_serializer(overdue_borrowings, many=True)
-        return Response({
-            'count': overdue_borrowings.count(),
-            'results': serializer.data
-        })
+        page = self.paginate_queryset(overdue_borrowings)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @extend_schema(responses=inline_serializer("OverdueCount", {"count": serializers.IntegerField()}))
+    @action(detail=False, methods=['get'])
+    def overdue_count(self, request):
+        """
+        Получение количества просроченных выдач.
+        
+        Облегчённый вариант overdue для счётчиков и виджетов: один
+        COUNT по индексу due_date без JOIN и сериализации.
+        
+        Args:
+            request: HTTP запрос
+            
+        Returns:
+            Response: Количество просроченных выдач
+        """
+        count = BorrowedBook.objects.filter(due_date__lt=self.today).count()
+        return Response({'count': count})
 
     @action(detail=False, methods=['get'])
     def due_soon(self, request):
@@ -150,22 +266,18 @@ class BorrowedBookViewset(
             request: HTTP запрос
             
         Returns:
-            Response: Список выдач, которые нужно вернуть в ближайшие 3 дня
+            Response: Страница выдач, которые нужно вернуть в ближайшие 3 дня
         """
-        from datetime import timedelta
-        
         # Выдачи, которые нужно вернуть в ближайшие 3 дня
-        due_soon_date = date.today() + timedelta(days=3)
+        due_soon_date = self.today + timedelta(days=3)
         due_soon_borrowings = self.get_queryset().filter(
             due_date__lte=due_soon_date,
-            due_date__gte=date.today()
+            due_date__gte=self.today
         )
         
-        serializer = self.get_serializer(due_soon_borrowings, many=True)
-        return Response({
-            'count': due_soon_borrowings.count(),
-            'results': serializer.data
-        })
+        page = self.paginate_queryset(due_soon_borrowings)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
     @action(detail=True, methods=['patch'])
     def extend(self, request, pk=None):
@@ -197,6 +309,12 @@ class BorrowedBookViewset(
         
         # Продлеваем срок возврата
         borrowing.extend_due_date(extend_days)
+        # Аннотации из get_queryset относятся к старой дате возврата
+        today = self.today
+        borrowing.is_overdue_db = borrowing.is_overdue(today)
+        days_overdue = borrowing.how_many_days_past_from_due_date(today)
+        borrowing.days_overdue_db = None if days_overdue is None else timedelta(days=days_overdue)
+        borrowing.fine_amount = DEFAULT_DAILY_FINE * (days_overdue or 0)
         
         serializer = self.get_serializer(borrowing)
         return Response(serializer.data)
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-14 18:17
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('borrowing', '0002_alter_borrowedbook_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='borrowedbook',
+            options={'verbose_name': 'Выдача книги', 'verbose_name_plural': 'Выдачи книг'},
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-14 18:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_generated_staff_code_membership_code'),
+        ('borrowing', '0003_remove_borrowedbook_ordering'),
+        ('library', '0003_alter_author_options_alter_book_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='borrowedbook',
+            index=models.Index(fields=['due_date', 'borrower'], name='br_due_borrower_idx'),
+        ),
+    ]
@@ -1,8 +1,85 @@
 from datetime import date, timedelta
+from decimal import Decimal
+from functools import cached_property
 from django.db import models
 from django.core.validators import MinValueValidator
 from django.core.exceptions import ValidationError
 
+# Штраф за один день просрочки по умолчанию
+DEFAULT_DAILY_FINE = Decimal("10.00")
+
+
+class DaysBetween(models.Func):
+    """
+    Количество дней между двумя датами (lhs - rhs) как целое число.
+    
+    В PostgreSQL разность двух date уже является integer, в SQLite
+    используется julianday(), в MySQL — DATEDIFF(). В отличие от
+    вычитания F()-выражений (DurationField) результат можно умножать
+    на числа прямо в SQL.
+    """
+    arg_joiner = " - "
+    template = "(%(expressions)s)"
+    output_field = models.IntegerField()
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection,
+            template="CAST(julianday(%(expressions)s) AS INTEGER)",
+            arg_joiner=") - julianday(",
+            **extra_context,
+        )
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection,
+            template="DATEDIFF(%(expressions)s)",
+            arg_joiner=", ",
+            **extra_context,
+        )
+
+
+class BorrowedBookQuerySet(models.QuerySet):
+    """
+    QuerySet выдач книг с готовыми наборами предзагрузки и аннотаций.
+    """
+
+    def with_display(self):
+        """
+        Предзагружает связи, которые использует BorrowedBook.__str__.
+        
+        Returns:
+            QuerySet: Выдачи с select_related книги и пользователя читателя
+        """
+        return self.select_related("book_item__book", "borrower__user")
+
+    def with_fines(self, daily_fine: Decimal = DEFAULT_DAILY_FINE, today: date | None = None):
+        """
+        Аннотирует размер штрафа за просрочку, вычисленный в SQL.
+        
+        Повторяет логику BorrowedBook.get_fine_amount(): штраф начисляется
+        за каждый полный день после даты возврата, до неё штраф равен 0.
+        
+        Args:
+            daily_fine (Decimal): Размер штрафа за один день просрочки
+            today (date, optional): Текущая дата (по умолчанию date.today())
+            
+        Returns:
+            QuerySet: Выдачи с аннотацией fine_amount (Decimal)
+        """
+        today = today or date.today()
+        return self.annotate(
+            fine_amount=models.Case(
+                models.When(
+                    due_date__lt=today,
+                    then=DaysBetween(models.Value(today, output_field=models.DateField()), models.F("due_date"))
+                    * models.Value(daily_fine),
+                ),
+                default=models.Value(Decimal("0.00")),
+                output_field=models.DecimalField(max_digits=10, decimal_places=2),
+            )
+        )
+
 
 class BorrowedBook(models.Model):
     """
@@ -17,6 +94,10 @@ class BorrowedBook(models.Model):
         borrowed_date (DateField): Дата выдачи книги
         due_date (DateField): Плановая дата возврата
         
+    Managers:
+        objects: BorrowedBookQuerySet (with_display() для вывода __str__ в списках,
+                 with_fines() для расчёта штрафов в SQL)
+        
     Methods:
         is_due_date_past(): Проверяет, просрочена ли выдача
         how_many_days_past_from_due_date(): Количество дней просрочки
@@ -57,6 +138,8 @@ class BorrowedBook(models.Model):
         help_text="Планируемая дата возврата книги"
     )
 
+    objects = BorrowedBookQuerySet.as_manager()
+
     def clean(self):
         """
         Валидация модели перед сохранением.
@@ -70,35 +153,43 @@ class BorrowedBook(models.Model):
                 "Дата возврата не может быть раньше даты выдачи"
             )
 
-    def is_due_date_past(self):
+    def is_due_date_past(self, today: date | None = None):
         """
         Проверяет, просрочена ли выдача книги.
         
+        Args:
+            today (date, optional): Текущая дата; передаётся, чтобы не вызывать
+                date.today() повторно при нескольких проверках подряд
+        
         Returns:
             bool: True, если срок возврата истек
         """
-        return self.due_date < date.today()
+        return self.due_date < (today or date.today())
     
-    def is_overdue(self):
+    def is_overdue(self, today: date | None = None):
         """
         Алиас для is_due_date_past() для лучшей читаемости кода.
         
+        Args:
+            today (date, optional): Текущая дата (по умолчанию date.today())
+        
         Returns:
             bool: True, если выдача просрочена
         """
-        return self.is_due_date_past()
+        return self.is_due_date_past(today)
 
-    def how_many_days_past_from_due_date(self):
+    def how_many_days_past_from_due_date(self, today: date | None = None):
         """
         Вычисляет количество дней просрочки.
         
+        Args:
+            today (date, optional): Текущая дата (по умолчанию date.today())
+        
         Returns:
             int or None: Количество дней просрочки или None, если не просрочена
         """
-        time_delta = date.today() - self.due_date
-        if time_delta.days >= 0:
-            return time_delta.days
-        return None
+        days = ((today or date.today()) - self.due_date).days
+        return days if days >= 0 else None
     
     def extend_due_date(self, days: int):
         """
@@ -112,25 +203,45 @@ class BorrowedBook(models.Model):
         """
         if days < 0:
             raise ValueError("Количество дней для продления должно быть положительным")
-            
-        self.due_date += timedelta(days=days)
-        self.save(update_fields=['due_date'])
+        
+        # Один UPDATE с F(): параллельные продления складываются в БД,
+        # а не перетирают друг друга. Значение в памяти обновляем без
+        # повторного SELECT.
+        delta = timedelta(days=days)
+        BorrowedBook.objects.filter(pk=self.pk).update(due_date=models.F('due_date') + delta)
+        self.due_date += delta
     
-    def get_fine_amount(self, daily_fine: float = 10.0):
+    def get_fine_amount(self, daily_fine: float = 10.0, today: date | None = None):
         """
         Рассчитывает размер штрафа за просрочку.
         
         Args:
             daily_fine (float): Размер штрафа за один день просрочки
+            today (date, optional): Текущая дата (по умолчанию date.today())
             
         Returns:
             float: Общий размер штрафа или 0, если просрочки нет
         """
-        overdue_days = self.how_many_days_past_from_due_date()
+        overdue_days = self.how_many_days_past_from_due_date(today)
         if overdue_days:
             return overdue_days * daily_fine
         return 0.0
 
+    @cached_property
+    def display_title(self):
+        """
+        Возвращает часть строкового представления "название книги → имя читателя".
+        
+        Значение кешируется на экземпляре, поэтому повторные вызовы str()
+        не обращаются к связанным объектам. Без предзагрузки связей
+        (BorrowedBook.objects.with_display()) первый вызов выполняет
+        запросы к книге и пользователю.
+        
+        Returns:
+            str: Название книги и имя читателя
+        """
+        return f"{self.book_item.book.title} → {self.borrower.user.username}"
+
     def __str__(self):
         """
         Возвращает строковое представление выдачи книги.
@@ -139,21 +250,22 @@ class BorrowedBook(models.Model):
             str: Строка в формате "Выдача: название книги → имя читателя (срок до даты)"
         """
         status = " [ПРОСРОЧЕНО]" if self.is_overdue() else ""
-        return (
-            f"Выдача: {self.book_item.book.title} → "
-            f"{self.borrower.user.username} (до {self.due_date}){status}"
-        )
+        return f"Выдача: {self.display_title} (до {self.due_date}){status}"
 
     class Meta:
         verbose_name = "Выдача книги"
         verbose_name_plural = "Выдачи книг"
-        # Сортировка по дате возврата (просроченные в начале)
-        ordering = ['due_date', 'borrowed_date']
+        # Без Meta.ordering: overdue_count считает COUNT без сортировки,
+        # а списки упорядочивают DueDateCursorPagination и
+        # BorrowedBookAdmin.ordering
         # Индексы для оптимизации запросов
         indexes = [
             models.Index(fields=['due_date']),
             models.Index(fields=['borrowed_date']),
             models.Index(fields=['borrower']),
+            # Фильтр по сроку возврата (overdue, due_soon) сразу отдаёт
+            # borrower_id для JOIN с читателем без чтения строк таблицы
+            models.Index(fields=['due_date', 'borrower'], name='br_due_borrower_idx'),
         ]
         # Ограничения на уровне базы данных
         constraints = [
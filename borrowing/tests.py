@@ -1,51 +1,90 @@
 from datetime import date, timedelta
+from decimal import Decimal
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 from rest_framework_simplejwt.tokens import RefreshToken
 
 from core.models import User
+from core.testing import CacheClearMixin, bulk_create_users
 from accounts.models import Member, Librarian
+from library.cache import invalidate_library_api_cache
 from library.models import Author, Book, BookItem
+from .api.exceptions import BookItemUnavailable
+from .api.serializers import BorrowedBookCreateSerializer
 from .models import BorrowedBook
 
 
+# Access-токены по pk пользователя: токен действует несколько минут,
+# поэтому в пределах класса тестов его не нужно подписывать заново
+_ACCESS_TOKENS: dict[int, str] = {}
+
+
 def get_jwt_for_user(user: User) -> str:
-    refresh = RefreshToken.for_user(user)
-    return str(refresh.access_token)
+    token = _ACCESS_TOKENS.get(user.pk)
+    if token is None:
+        refresh = RefreshToken.for_user(user)
+        token = _ACCESS_TOKENS[user.pk] = str(refresh.access_token)
+    return token
 
 
-class BorrowingApiTests(APITestCase):
-    def setUp(self):
-        # Users
-        self.admin = User.objects.create_user(username="admin", email="admin@example.com", password="Admin_pass_123!")
-        self.admin.is_staff = True
-        self.admin.save(update_fields=["is_staff"])
+class BorrowingApiTests(CacheClearMixin, APITestCase):
+    # APITestCase (django.test.TestCase) оборачивает класс в транзакцию,
+    # а каждый тест — в SAVEPOINT с откатом, поэтому данные setUpTestData
+    # не пересоздаются между тестами. Тесты не должны закрывать соединение,
+    # выполнять COMMIT/DDL через raw SQL или использовать
+    # TransactionTestCase — это сбросит общую транзакцию класса.
+    list_url = "/api/books/"  # BorrowedBookViewset router
 
-        self.librarian_user = User.objects.create_user(username="lib", email="lib@example.com", password="Lib_pass_123!")
-        self.member_user = User.objects.create_user(username="mem", email="mem@example.com", password="Mem_pass_123!")
+    @classmethod
+    def setUpTestData(cls):
+        # Users
+        cls.admin, cls.librarian_user, cls.member_user = bulk_create_users(
+            User(username="admin", email="admin@example.com", password="Admin_pass_123!", is_staff=True),
+            User(username="lib", email="lib@example.com", password="Lib_pass_123!"),
+            User(username="mem", email="mem@example.com", password="Mem_pass_123!"),
+        )
 
         # Roles
-        Librarian.objects.create(user=self.librarian_user, staff_code="LIB0001")
-        self.member = Member.objects.create(user=self.member_user, membership_code="MEM0001")
+        Librarian.objects.create(user=cls.librarian_user)
+        cls.member = Member.objects.create(user=cls.member_user)
 
         # Book and item
-        self.author = Author.objects.create(name="Author One")
-        self.book = Book.objects.create(title="Book One", isbn="ISBN-0001", subject="Test", page_counts=100)
-        self.book.author.add(self.author)
-        self.book_item = BookItem.objects.create(
-            book=self.book,
+        cls.author = Author.objects.create(name="Author One")
+        cls.book = Book.objects.create(title="Book One", isbn="ISBN-0001", subject="Test", page_counts=100)
+        # Строка связи M2M без SELECT существующих связей, который делает add()
+        Book.author.through.objects.bulk_create([
+            Book.author.through(book_id=cls.book.pk, author_id=cls.author.pk),
+        ])
+        cls.book_item = BookItem.objects.create(
+            book=cls.book,
             barcode="BAR0001",
             status=BookItem.STATUS_AVAILABLE,
             publication_date=date(2020, 1, 1),
         )
 
-        self.list_url = "/api/books/"  # BorrowedBookViewset router
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls._auth_clients = {}
+
+    @classmethod
+    def tearDownClass(cls):
+        # pk пользователей могут повторяться в других классах тестов
+        _ACCESS_TOKENS.clear()
+        cls._auth_clients.clear()
+        super().tearDownClass()
 
     def auth_client(self, user: User) -> APIClient:
-        client = APIClient()
-        token = get_jwt_for_user(user)
-        client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        # Клиент с JWT создается один раз на пользователя в пределах класса;
+        # ответы API выдач не устанавливают cookie, поэтому состояние
+        # клиента между тестами не переносится
+        client = self._auth_clients.get(user.pk)
+        if client is None:
+            client = self._auth_clients[user.pk] = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f"Bearer {get_jwt_for_user(user)}")
         return client
 
     def test_requires_auth_for_list(self):
@@ -59,9 +98,33 @@ class BorrowingApiTests(APITestCase):
             "borrower": self.member.id,
             "due_date": (date.today() + timedelta(days=7)).isoformat(),
         }
-        response = client.post(self.list_url, payload, format="json")
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = client.post(self.list_url, payload, format="json")
         self.assertEqual(response.status_code, status.HTTP_201_CREATED, msg="Админ должен уметь создавать выдачу")
+        # Кеш каталога сбрасывается только после COMMIT выдачи
+        self.assertIn(invalidate_library_api_cache, callbacks)
         self.assertEqual(BorrowedBook.objects.count(), 1, msg="Должна быть создана одна запись выдачи")
+        self.book_item.refresh_from_db(fields=["status"])
+        self.assertEqual(self.book_item.status, BookItem.STATUS_BORROWED, msg="Экземпляр должен стать выданным")
+
+    def test_create_conflicts_when_item_taken_concurrently(self):
+        client = self.auth_client(self.admin)
+        payload = {
+            "book_item": self.book_item.id,
+            "borrower": self.member.id,
+            "due_date": (date.today() + timedelta(days=7)).isoformat(),
+        }
+        serializer = BorrowedBookCreateSerializer(data=payload)
+        self.assertTrue(serializer.is_valid())
+        # Параллельный запрос успел выдать экземпляр после валидации
+        BookItem.objects.filter(pk=self.book_item.pk).update(status=BookItem.STATUS_BORROWED)
+        with self.assertRaises(BookItemUnavailable):
+            serializer.save()
+        self.assertEqual(BorrowedBook.objects.count(), 0)
+
+        # Через API уже выданный экземпляр отклоняется валидацией
+        response = client.post(self.list_url, payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
     def test_member_cannot_create_borrowed_book(self):
         client = self.auth_client(self.member_user)
@@ -76,6 +139,7 @@ class BorrowingApiTests(APITestCase):
 
     def test_librarian_can_delete_borrowed_book(self):
         # Pre-create borrowing
+        BookItem.objects.filter(pk=self.book_item.pk).update(status=BookItem.STATUS_BORROWED)
         borrowing = BorrowedBook.objects.create(
             book_item=self.book_item,
             borrower=self.member,
@@ -83,8 +147,179 @@ class BorrowingApiTests(APITestCase):
         )
         client = self.auth_client(self.librarian_user)
         url = f"/api/books/{borrowing.id}/"
-        response = client.delete(url)
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = client.delete(url)
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT, msg="Библиотекарь должен уметь удалять выдачу")
+        self.assertIn(invalidate_library_api_cache, callbacks)
         self.assertEqual(BorrowedBook.objects.count(), 0, msg="Запись должна быть удалена")
+        self.book_item.refresh_from_db(fields=["status"])
+        self.assertEqual(self.book_item.status, BookItem.STATUS_AVAILABLE, msg="Экземпляр должен снова стать доступным")
+
+    def test_list_borrowed_books_query_count(self):
+        # Количество запросов не должно зависеть от числа выдач (нет N+1)
+        for i in range(2):
+            item = BookItem.objects.create(
+                book=self.book,
+                barcode=f"BAR100{i}",
+                status=BookItem.STATUS_BORROWED,
+                publication_date=date(2020, 1, 1),
+            )
+            BorrowedBook.objects.create(
+                book_item=item,
+                borrower=self.member,
+                due_date=date.today() + timedelta(days=5),
+            )
+        client = self.auth_client(self.admin)
+        # Пользователь из JWT + выдачи с JOIN (авторы в списке не выводятся)
+        with self.assertNumQueries(2):
+            response = client.get(self.list_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data["results"]
+        self.assertEqual(len(results), 2)
+        self.assertEqual(results[0]["book_item_title"], "Book One")
+        self.assertEqual(results[0]["borrower_code"], self.member.membership_code)
+
+        # Курсорная пагинация: вторая страница доступна по ссылке next
+        response = client.get(self.list_url, {"page_size": 1})
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertIsNotNone(response.data["next"])
+
+    def test_retrieve_does_not_load_unused_user_columns(self):
+        borrowing = BorrowedBook.objects.create(
+            book_item=self.book_item,
+            borrower=self.member,
+            due_date=date.today() + timedelta(days=5),
+        )
+        client = self.auth_client(self.admin)
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(f"{self.list_url}{borrowing.id}/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # Последний запрос — предзагрузка авторов, перед ним — выдача с JOIN
+        borrowings_sql = ctx.captured_queries[-2]["sql"]
+        self.assertIn("borrowing_borrowedbook", borrowings_sql)
+        self.assertNotIn('"password"', borrowings_sql)
+
+    def test_due_soon_counts_without_extra_query(self):
+        BorrowedBook.objects.create(
+            book_item=self.book_item,
+            borrower=self.member,
+            due_date=date.today() + timedelta(days=2),
+        )
+        client = self.auth_client(self.admin)
+        # Пользователь из JWT + выдачи с JOIN (без COUNT)
+        with self.assertNumQueries(2):
+            response = client.get(f"{self.list_url}due_soon/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 1)
+
+    def test_overdue_status_is_annotated(self):
+        borrowing = BorrowedBook.objects.create(
+            book_item=self.book_item,
+            borrower=self.member,
+            due_date=date.today() + timedelta(days=5),
+        )
+        # Сдвигаем даты в прошлое в обход валидаторов модели
+        BorrowedBook.objects.filter(pk=borrowing.pk).update(
+            borrowed_date=date.today() - timedelta(days=10),
+            due_date=date.today() - timedelta(days=3),
+        )
+        client = self.auth_client(self.admin)
+        response = client.get(f"{self.list_url}{borrowing.id}/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data["is_overdue"])
+        self.assertEqual(response.data["days_overdue"], 3)
+        self.assertEqual(response.data["fine_amount"], "30.00")
+
+        # После продления статус пересчитывается по новой дате
+        response = client.patch(f"{self.list_url}{borrowing.id}/extend/", {"days": 7}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data["is_overdue"])
+        self.assertIsNone(response.data["days_overdue"])
+        self.assertEqual(response.data["fine_amount"], "0.00")
+
+    def test_overdue_helpers_accept_today(self):
+        borrowing = BorrowedBook(due_date=date(2024, 5, 10))
+        self.assertFalse(borrowing.is_overdue(date(2024, 5, 10)))
+        self.assertEqual(borrowing.how_many_days_past_from_due_date(date(2024, 5, 10)), 0)
+        self.assertIsNone(borrowing.how_many_days_past_from_due_date(date(2024, 5, 9)))
+        self.assertTrue(borrowing.is_overdue(date(2024, 5, 13)))
+        self.assertEqual(borrowing.get_fine_amount(5.0, today=date(2024, 5, 13)), 15.0)
+
+    def test_with_fines_matches_get_fine_amount(self):
+        borrowing = BorrowedBook.objects.create(
+            book_item=self.book_item,
+            borrower=self.member,
+            due_date=date.today() + timedelta(days=5),
+        )
+        due_date = borrowing.due_date
+        for today in (due_date - timedelta(days=1), due_date, due_date + timedelta(days=4)):
+            annotated = BorrowedBook.objects.with_fines(today=today).get(pk=borrowing.pk)
+            self.assertEqual(annotated.fine_amount, Decimal(str(borrowing.get_fine_amount(today=today))))
+
+    def test_str_with_display_does_not_query(self):
+        BorrowedBook.objects.create(
+            book_item=self.book_item,
+            borrower=self.member,
+            due_date=date.today() + timedelta(days=5),
+        )
+        borrowing = BorrowedBook.objects.with_display().get()
+        with self.assertNumQueries(0):
+            self.assertIn("Book One → mem", str(borrowing))
+
+    def test_extend_updates_due_date_in_single_update(self):
+        due_date = date.today() + timedelta(days=5)
+        borrowing = BorrowedBook.objects.create(
+            book_item=self.book_item,
+            borrower=self.member,
+            due_date=due_date,
+        )
+        client = self.auth_client(self.admin)
+        # Пользователь из JWT + выдача с JOIN + предзагрузка авторов + UPDATE
+        with self.assertNumQueries(4):
+            response = client.patch(f"{self.list_url}{borrowing.id}/extend/", {"days": 7}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        expected = due_date + timedelta(days=7)
+        self.assertEqual(response.data["due_date"], expected.isoformat())
+        borrowing.refresh_from_db(fields=["due_date"])
+        self.assertEqual(borrowing.due_date, expected)
+
+    def test_list_ordering(self):
+        for i, days in enumerate((9, 3)):
+            item = BookItem.objects.create(
+                book=self.book,
+                barcode=f"BAR200{i}",
+                status=BookItem.STATUS_BORROWED,
+                publication_date=date(2020, 1, 1),
+            )
+            BorrowedBook.objects.create(
+                book_item=item,
+                borrower=self.member,
+                due_date=date.today() + timedelta(days=days),
+            )
+        client = self.auth_client(self.admin)
+        response = client.get(self.list_url)
+        due_dates = [row["due_date"] for row in response.data["results"]]
+        self.assertEqual(due_dates, sorted(due_dates), msg="По умолчанию ближайший срок возврата первым")
+
+        response = client.get(self.list_url, {"ordering": "-due_date"})
+        due_dates = [row["due_date"] for row in response.data["results"]]
+        self.assertEqual(due_dates, sorted(due_dates, reverse=True))
+
+    def test_overdue_count_uses_single_count_query(self):
+        borrowing = BorrowedBook.objects.create(
+            book_item=self.book_item,
+            borrower=self.member,
+            due_date=date.today() + timedelta(days=5),
+        )
+        BorrowedBook.objects.filter(pk=borrowing.pk).update(
+            borrowed_date=date.today() - timedelta(days=10),
+            due_date=date.today() - timedelta(days=1),
+        )
+        client = self.auth_client(self.admin)
+        # Пользователь из JWT + COUNT
+        with self.assertNumQueries(2):
+            response = client.get(f"{self.list_url}overdue_count/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {"count": 1})
 
 # Create your tests here.
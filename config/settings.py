@@ -78,7 +78,7 @@ REST_AUTH = {
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'core.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
     'DEFAULT_FILTER_BACKENDS': (
@@ -139,6 +139,13 @@ DATABASES = {
     }
 }
 
+# Кеш (ответы API каталога, пользователи JWT). В продакшене задается
+# CACHE_URL=redis://host:6379/0 (django.core.cache.backends.redis.RedisCache),
+# по умолчанию используется локальная память процесса.
+CACHES = {
+    "default": env.cache("CACHE_URL", default="locmemcache://"),
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        # Подключаем обработчики сигналов (сброс кеша пользователя JWT)
+        # и расширение drf-spectacular для CachedJWTAuthentication
+        from . import schema, signals  # noqa: F401
@@ -0,0 +1,113 @@
+from django.core.cache import cache
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+# Ключ и время жизни (в секундах) кеша пользователя из JWT
+JWT_USER_CACHE_KEY = "auth:jwt_user:{user_id}"
+JWT_USER_CACHE_TIMEOUT = 30
+# Поля пользователя, которые хранятся в кеше (проверки аутентификации
+# и IsAdminOrLibrarian); хеш пароля в кеш не попадает
+JWT_USER_CACHED_FIELDS = ("id", "is_active", "is_staff")
+
+
+def get_jwt_user_cache_key(user_id):
+    """
+    Возвращает ключ кеша пользователя для JWT аутентификации.
+    
+    Args:
+        user_id (int): ID пользователя
+        
+    Returns:
+        str: Ключ кеша в формате "auth:jwt_user:{user_id}"
+    """
+    return JWT_USER_CACHE_KEY.format(user_id=user_id)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT аутентификация с кешированием пользователя.
+    
+    Стандартный JWTAuthentication на каждый запрос выполняет SELECT
+    пользователя по user_id из токена. Здесь на JWT_USER_CACHE_TIMEOUT
+    секунд в django.core.cache сохраняются только поля, нужные проверкам
+    запроса (JWT_USER_CACHED_FIELDS), и дайджест хеша пароля для
+    CHECK_REVOKE_TOKEN. Сам хеш пароля и остальные поля в кеш не попадают.
+    
+    Note:
+        Подпись токена по-прежнему проверяется на каждый запрос:
+        проверка HMAC дешевле обращения к кешу.
+        Кеш сбрасывается сигналами при save() и delete() пользователя
+        (core.signals). При locmem-кеше сброс виден только в текущем
+        процессе: другие процессы увидят смену пароля, is_active или
+        is_staff не позже чем через JWT_USER_CACHE_TIMEOUT секунд. Для
+        общего кеша (CACHE_URL, Redis) сброс виден всем процессам.
+        Изменения через QuerySet.update() сигналы не отправляют и
+        применяются только по истечении таймаута.
+    """
+
+    def get_user(self, validated_token):
+        """
+        Возвращает пользователя по закешированным полям или из БД.
+        
+        Args:
+            validated_token (Token): Проверенный токен
+            
+        Returns:
+            User: Пользователь, указанный в токене. При попадании в кеш
+                  загружены только JWT_USER_CACHED_FIELDS, остальные поля
+                  отложены и читаются из БД при первом обращении
+            
+        Raises:
+            InvalidToken: Если в токене нет идентификатора пользователя
+            AuthenticationFailed: Если пользователь не найден, неактивен
+                                  или сменил пароль (CHECK_REVOKE_TOKEN)
+        """
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            # Родительский метод сформирует стандартную ошибку
+            return super().get_user(validated_token)
+
+        key = get_jwt_user_cache_key(user_id)
+        cached = cache.get(key)
+        if cached is None:
+            # Первичная загрузка со всеми проверками JWTAuthentication
+            user = super().get_user(validated_token)
+            cached = {field: getattr(user, field) for field in JWT_USER_CACHED_FIELDS}
+            cached["password_digest"] = get_md5_hash_password(user.password)
+            cache.set(key, cached, JWT_USER_CACHE_TIMEOUT)
+            return user
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not cached["is_active"]:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != cached["password_digest"]:
+            # Токен, выданный до смены пароля, не должен пройти по кешу
+            raise AuthenticationFailed(
+                _("The user's password has been changed."), code="password_changed"
+            )
+        return self._user_from_cache(cached)
+
+    def _user_from_cache(self, cached):
+        """
+        Собирает пользователя из закешированных полей без запроса к БД.
+        
+        Args:
+            cached (dict): Значения JWT_USER_CACHED_FIELDS
+            
+        Returns:
+            User: Экземпляр как после only(*JWT_USER_CACHED_FIELDS)
+        """
+        field_names = [
+            field.attname for field in self.user_model._meta.concrete_fields
+            if field.attname in JWT_USER_CACHED_FIELDS
+        ]
+        return self.user_model.from_db(
+            router.db_for_read(self.user_model),
+            field_names,
+            [cached[name] for name in field_names],
+        )
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-14 18:26
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_alter_user_options_alter_user_email_and_more'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='user',
+            name='core_user_email_38052c_idx',
+        ),
+    ]
@@ -38,7 +38,5 @@ class User(AbstractUser):
     class Meta:
         verbose_name = "Пользователь"
         verbose_name_plural = "Пользователи"
-        # Индекс для ускорения поиска по email
-        indexes = [
-            models.Index(fields=['email']),
-        ]
+        # Отдельный индекс по email не нужен: unique=True уже создает
+        # уникальный B-tree индекс, второй только замедлял бы INSERT/UPDATE
@@ -0,0 +1,59 @@
+from rest_framework.pagination import CursorPagination
+
+
+class IdCursorPagination(CursorPagination):
+    """
+    Курсорная (keyset) пагинация по первичному ключу.
+    
+    В отличие от PageNumberPagination не выполняет SELECT COUNT(*)
+    и не использует OFFSET: следующая страница выбирается условием
+    WHERE id < :last_id ORDER BY id DESC LIMIT page_size по индексу PK.
+    
+    Query Parameters:
+        cursor (str): Непрозрачный курсор из ссылок next/previous
+        page_size (int): Размер страницы (не более max_page_size)
+        
+    Response Format:
+        {
+            "next": "http://.../?cursor=...",
+            "previous": null,
+            "results": [...]
+        }
+    """
+    ordering = "-id"
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
+class DueDateCursorPagination(IdCursorPagination):
+    """
+    Курсорная пагинация выдач по дате возврата.
+    
+    Сохраняет привычный порядок выдач (ближайший срок возврата первым)
+    и использует индекс по due_date. id добавлен как второй ключ,
+    чтобы порядок был стабильным при совпадающих датах.
+    """
+    ordering = ("due_date", "id")
+
+
+class TitleCursorPagination(IdCursorPagination):
+    """
+    Курсорная пагинация книг по названию.
+    
+    Сохраняет алфавитный порядок каталога и использует индекс по title.
+    id добавлен как второй ключ для одинаковых названий.
+    """
+    ordering = ("title", "id")
+
+
+class BarcodeCursorPagination(IdCursorPagination):
+    """
+    Курсорная пагинация экземпляров книги по штрих-коду.
+    
+    Сохраняет прежний порядок экземпляров; штрих-код уникален, поэтому
+    второй ключ не нужен. Для списка экземпляров одной книги условие
+    WHERE book_id = :book AND barcode > :last выполняется по индексу
+    (book, barcode).
+    """
+    ordering = "barcode"
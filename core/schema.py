@@ -0,0 +1,11 @@
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+
+
+class CachedJWTScheme(SimpleJWTScheme):
+    """
+    Описание CachedJWTAuthentication в схеме OpenAPI.
+    
+    Схема совпадает со стандартной jwtAuth (Bearer токен), так как
+    кеширование пользователя не меняет формат аутентификации.
+    """
+    target_class = "core.authentication.CachedJWTAuthentication"
@@ -0,0 +1,29 @@
+from functools import partial
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import get_jwt_user_cache_key
+from .models import User
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_jwt_user_cache(sender, instance, **kwargs):
+    """
+    Сбрасывает кеш пользователя JWT аутентификации при изменении/удалении User.
+    
+    Args:
+        sender: Модель User
+        instance (User): Сохраненный или удаленный пользователь
+        
+    Note:
+        Ключ удаляется сразу и повторно после COMMIT: параллельный запрос
+        до COMMIT закешировал бы прежние is_active, is_staff и дайджест
+        пароля на JWT_USER_CACHE_TIMEOUT.
+    """
+    key = get_jwt_user_cache_key(instance.pk)
+    cache.delete(key)
+    transaction.on_commit(partial(cache.delete, key))
@@ -0,0 +1,38 @@
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+
+from .models import User
+
+
+class CacheClearMixin:
+    """
+    Примесь к TestCase, очищающая django.core.cache перед каждым тестом.
+
+    Откат транзакции теста не затрагивает кеш: без очистки кеш прав
+    библиотекаря, пользователя JWT и ответов каталога переходил бы
+    из теста в тест.
+
+    Example:
+        class BorrowingApiTests(CacheClearMixin, APITestCase):
+            ...
+    """
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+
+def bulk_create_users(*users):
+    """
+    Создает пользователей одним INSERT.
+
+    Args:
+        *users (User): Несохраненные пользователи; password задается
+                       открытым текстом и хешируется здесь
+
+    Returns:
+        list[User]: Созданные пользователи в порядке аргументов
+    """
+    for user in users:
+        user.password = make_password(user.password)
+    return User.objects.bulk_create(users)
@@ -1 +1,69 @@
-# Create your tests here.
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .authentication import CachedJWTAuthentication, get_jwt_user_cache_key
+from .models import User
+from .testing import CacheClearMixin
+
+
+class CachedJWTAuthenticationTests(CacheClearMixin, APITestCase):
+    url = "/api/books/overdue_count/"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username="admin", email="admin@example.com", password="Admin_pass_123!")
+        cls.admin.is_staff = True
+        cls.admin.save(update_fields=["is_staff"])
+
+    def setUp(self):
+        super().setUp()
+        token = RefreshToken.for_user(self.admin).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def test_user_is_loaded_once_per_cache_window(self):
+        # Пользователь из JWT + COUNT
+        with self.assertNumQueries(2):
+            self.client.get(self.url)
+        # Пользователь берется из кеша
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_user_cache_reset_after_commit(self):
+        self.client.get(self.url)
+        key = get_jwt_user_cache_key(self.admin.pk)
+        stale = cache.get(key)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.admin.is_staff = False
+            self.admin.save(update_fields=["is_staff"])
+            # Запрос до COMMIT кеширует поля, прочитанные до изменения
+            cache.set(key, stale)
+        for callback in callbacks:
+            callback()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_cache_stores_only_required_fields(self):
+        self.client.get(self.url)
+        cached = cache.get(get_jwt_user_cache_key(self.admin.pk))
+        self.assertEqual(set(cached), {"id", "is_active", "is_staff", "password_digest"})
+        self.assertNotIn(self.admin.password, cached.values())
+        # Пользователь из кеша: отложенные поля читаются из БД по обращению
+        user = CachedJWTAuthentication().get_user(RefreshToken.for_user(self.admin).access_token)
+        self.assertEqual((user.pk, user.is_staff), (self.admin.pk, True))
+        with self.assertNumQueries(1):
+            self.assertEqual(user.username, "admin")
+
+    def test_user_change_resets_cache(self):
+        self.client.get(self.url)
+        self.admin.is_staff = False
+        self.admin.save(update_fields=["is_staff"])
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN, msg="Снятый флаг is_staff должен применяться сразу")
+
+        self.admin.is_active = False
+        self.admin.save(update_fields=["is_active"])
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED, msg="Неактивный пользователь не проходит аутентификацию")
@@ -3,7 +3,36 @@ from django_filters import rest_framework as filters
 from ..models import Book, Author, BookItem
 
 
-class AuthorFilter(filters.FilterSet):
+class CachedFormFilterSet(filters.FilterSet):
+    """
+    FilterSet, который строит класс формы один раз на процесс.
+    
+    По умолчанию django-filter создает новый класс формы через type()
+    для каждого экземпляра фильтра, то есть на каждый запрос. Фильтры
+    в этом модуле не меняются на уровне экземпляра, поэтому класс формы
+    кешируется на самом классе FilterSet (у каждого подкласса свой).
+    
+    Note:
+        Экземпляры формы по-прежнему создаются на каждый запрос,
+        а Django копирует поля формы для каждого экземпляра.
+    """
+
+    def get_form_class(self):
+        """
+        Возвращает закешированный класс формы фильтра.
+        
+        Returns:
+            type: Класс формы, построенный по base_filters
+        """
+        filterset_class = type(self)
+        form_class = filterset_class.__dict__.get("_cached_form_class")
+        if form_class is None:
+            form_class = super().get_form_class()
+            filterset_class._cached_form_class = form_class
+        return form_class
+
+
+class AuthorFilter(CachedFormFilterSet):
     """
     Фильтр для поиска авторов в библиотечной системе.
     
@@ -37,7 +66,7 @@ class AuthorFilter(filters.FilterSet):
         fields = ["name"]
 
 
-class BookFilter(filters.FilterSet):
+class BookFilter(CachedFormFilterSet):
     """
     Комплексный фильтр для поиска книг в библиотечной системе.
     
@@ -60,11 +89,14 @@ class BookFilter(filters.FilterSet):
         isbn (CharField): Поиск по ISBN номеру
             - exact: Точное совпадение ISBN (единственный вариант)
             
+        available (BooleanField): Наличие доступных для выдачи экземпляров
+            
     Usage Examples:
         GET /library/books/?title__icontains=python
         GET /library/books/?author__name__icontains=лутц
         GET /library/books/?subject=Программирование
         GET /library/books/?isbn=978-5-94723-568-9
+        GET /library/books/?available=true
         GET /library/books/?title__icontains=django&subject__icontains=програм
         
     Complex Queries:
@@ -75,19 +107,47 @@ class BookFilter(filters.FilterSet):
         - Поиск по ISBN самый быстрый (индексированное поле)
         - icontains запросы медленнее exact запросов
         - author__name использует JOIN с таблицей авторов
+        - available проверяется подзапросом EXISTS (Book.objects.available())
     """
-    
+    # Фильтры объявлены явно (вместо словаря Meta.fields), набор
+    # параметров запроса тот же
+    title = filters.CharFilter(field_name="title")
+    title__icontains = filters.CharFilter(field_name="title", lookup_expr="icontains")
+    subject = filters.CharFilter(field_name="subject")
+    subject__icontains = filters.CharFilter(field_name="subject", lookup_expr="icontains")
+    author__name = filters.CharFilter(field_name="author__name")
+    author__name__icontains = filters.CharFilter(field_name="author__name", lookup_expr="icontains")
+    isbn = filters.CharFilter(field_name="isbn")
+    available = filters.BooleanFilter(
+        method="filter_available",
+        help_text="Есть ли доступные для выдачи экземпляры (true/false)"
+    )
+
     class Meta:
         model = Book
-        fields = {
-            "title": ["exact", "icontains"],
-            "subject": ["exact", "icontains"], 
-            "author__name": ["exact", "icontains"],
-            "isbn": ["exact"],
-        }
+        fields = [
+            "title", "title__icontains",
+            "subject", "subject__icontains",
+            "author__name", "author__name__icontains",
+            "isbn", "available",
+        ]
+
+    def filter_available(self, queryset, name, value):
+        """
+        Отбирает книги по наличию доступных экземпляров.
+        
+        Args:
+            queryset (QuerySet): Книги
+            name (str): Имя фильтра
+            value (bool): Требуемое наличие
+            
+        Returns:
+            QuerySet: Книги с доступными экземплярами (или без них)
+        """
+        return queryset.available(value)
 
 
-class BookItemFilter(filters.FilterSet):
+class BookItemFilter(CachedFormFilterSet):
     """
     Фильтр для поиска экземпляров книг с поддержкой диапазонов дат.
     
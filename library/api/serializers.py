@@ -1,5 +1,9 @@
+from django.core.cache import cache
+from django.db import models
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
+from ..cache import BOOK_REPRESENTATION_CACHE_TIMEOUT, get_book_representation_cache_key
 from ..models import Book, BookItem, Author
 
 
@@ -37,17 +41,32 @@ class AuthorListSerializer(serializers.ModelSerializer):
         name (str): Полное имя автора  
         description (str): Биография или описание автора
         books (QuerySet): Список книг данного автора
+        books_count (int): Количество книг автора
         
     Note:
         Используется только для операций чтения списков авторов.
         Для создания/обновления используйте AuthorSerializer.
+        books_count считается по предзагруженным книгам
+        (Author.get_books_count()), без COUNT на каждого автора.
     """
+    books_count = serializers.IntegerField(source="get_books_count", read_only=True)
+
     class Meta:
         model = Author
-        fields = ("id", "name", "description", "books")
+        fields = ("id", "name", "description", "books", "books_count")
         read_only_fields = ("id", "books")
 
 
+class CachedBookListSerializer(serializers.ListSerializer):
+    """
+    ListSerializer книг, читающий кеш представлений одним get_many().
+    """
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.manager.BaseManager) else data
+        return self.child.to_representation_many(list(iterable))
+
+
 class BookSerializer(serializers.ModelSerializer):
     """
     Сериализатор для отображения полной информации о книге.
@@ -65,15 +84,117 @@ class BookSerializer(serializers.ModelSerializer):
         page_counts (int): Количество страниц
         
     Note:
-        Для создания/обновления книг используйте BookCreateUpdateSerializer.
+        Для создания/обновления книг используйте BookCreateUpdateSerializer
+        (авторы по ID), этот сериализатор только для чтения.
+        Представление кешируется по ID и updated_at книги
+        (library.cache), если updated_at загружен.
     """
-    # Вложенный сериализатор для отображения авторов
-    author = AuthorSerializer(many=True, read_only=True)
+    # Авторы собираются словарями: без экземпляра AuthorSerializer и его
+    # полей на каждую книгу. Формат совпадает с AuthorSerializer.
+    author = serializers.SerializerMethodField()
+
+    # Поля, которые не кешируются: зависят от аннотаций queryset,
+    # а не от самой книги
+    uncached_fields = ()
 
     class Meta:
         model = Book
         fields = ("id", "title", "isbn", "author", "subject", "page_counts")
         read_only_fields = ("id",)
+        list_serializer_class = CachedBookListSerializer
+
+    def to_representation(self, instance):
+        return self.to_representation_many([instance])[0]
+
+    def to_representation_many(self, books):
+        """
+        Сериализует книги, используя кеш представлений.
+        
+        Args:
+            books (list[Book]): Книги
+            
+        Returns:
+            list[dict]: Представления книг в том же порядке
+            
+        Note:
+            Кеш читается и пополняется одним get_many()/set_many() на
+            весь список. Поля uncached_fields вычисляются всегда.
+        """
+        keys = [get_book_representation_cache_key(book) for book in books]
+        cached = cache.get_many([key for key in keys if key])
+        missing = {}
+        result = []
+        for book, key in zip(books, keys):
+            data = cached.get(key) if key else None
+            if data is None:
+                data = super().to_representation(book)
+                if key:
+                    missing[key] = {
+                        name: value for name, value in data.items()
+                        if name not in self.uncached_fields
+                    }
+            else:
+                data = {**data, **self._represent_fields(book, self.uncached_fields)}
+            result.append(data)
+        if missing:
+            cache.set_many(missing, BOOK_REPRESENTATION_CACHE_TIMEOUT)
+        return result
+
+    def _represent_fields(self, instance, names):
+        """
+        Сериализует только указанные поля (как ModelSerializer.to_representation).
+        """
+        data = {}
+        for name in names:
+            field = self.fields[name]
+            attribute = field.get_attribute(instance)
+            data[name] = None if attribute is None else field.to_representation(attribute)
+        return data
+
+    @extend_schema_field(AuthorSerializer(many=True))
+    def get_author(self, obj):
+        """
+        Возвращает авторов книги в формате AuthorSerializer.
+        
+        Args:
+            obj (Book): Книга
+            
+        Returns:
+            list[dict]: id, name и description каждого автора
+            
+        Note:
+            Использует obj.author.all(), а не values(): так читается
+            кеш prefetch_related("author") из queryset представления и
+            не выполняется отдельный запрос на каждую книгу.
+        """
+        return [
+            {"id": author.id, "name": author.name, "description": author.description}
+            for author in obj.author.all()
+        ]
+
+
+class BookListSerializer(BookSerializer):
+    """
+    Сериализатор книги для списков с количеством экземпляров.
+    
+    Счетчики берутся из аннотаций Book.objects.with_copies_counts(),
+    поэтому список не выполняет COUNT на каждую книгу.
+    
+    Fields:
+        available_copies (int): Количество доступных экземпляров
+        total_copies (int): Общее количество экземпляров
+        
+    Note:
+        Требует queryset с with_copies_counts(). Для вложенного вывода
+        книги (экземпляры, выдачи) используется BookSerializer.
+    """
+    available_copies = serializers.IntegerField(source="available_copies_count", read_only=True)
+    total_copies = serializers.IntegerField(source="total_copies_count", read_only=True)
+
+    uncached_fields = ("available_copies", "total_copies")
+
+    class Meta(BookSerializer.Meta):
+        fields = BookSerializer.Meta.fields + ("available_copies", "total_copies")
 
 
 class BookCreateUpdateSerializer(serializers.ModelSerializer):
@@ -133,6 +254,36 @@ class BookItemSerializer(serializers.ModelSerializer):
         read_only_fields = ("id", "book")
 
 
+class BookItemListSerializer(serializers.ModelSerializer):
+    """
+    Плоский сериализатор экземпляра книги для списочных представлений.
+    
+    Название и авторы берутся из денормализованных полей BookItem,
+    поэтому список строится одним запросом без JOIN с книгой и
+    предзагрузки авторов.
+    
+    Fields:
+        id (int): Уникальный идентификатор экземпляра
+        book (int): ID книги
+        book_title (str): Название книги
+        book_authors (str): Имена авторов через запятую
+        barcode (str): Штрих-код экземпляра
+        status (str): Текущий статус экземпляра
+        publication_date (date): Дата публикации издания
+        
+    Note:
+        Для детального просмотра с вложенной книгой используйте
+        BookItemSerializer.
+    """
+    class Meta:
+        model = BookItem
+        fields = (
+            "id", "book", "book_title", "book_authors",
+            "barcode", "status", "publication_date",
+        )
+        read_only_fields = fields
+
+
 class BookItemCreateUpdateSerializer(serializers.ModelSerializer):
     """
     Сериализатор для создания и обновления экземпляров книг.
@@ -183,3 +334,23 @@ class BookItemCreateUpdateSerializer(serializers.ModelSerializer):
         book_id = self.context["book_id"]
         # Создаем экземпляр книги, связанный с указанной книгой
         return BookItem.objects.create(book_id=book_id, **validated_data)
+
+
+class BookItemBulkStatusSerializer(serializers.Serializer):
+    """
+    Сериализатор массовой смены статуса экземпляров книги.
+    
+    Fields:
+        ids (List[int]): ID экземпляров книги из URL
+        status (str): Новый статус (A/B/R/L)
+        
+    Validation:
+        - ids не может быть пустым и содержит не более 1000 значений
+        - status должен быть одним из BookItem.STATUS_CHOICES
+    """
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=1000,
+    )
+    status = serializers.ChoiceField(choices=BookItem.STATUS_CHOICES)
@@ -1,22 +1,38 @@
-from drf_spectacular.utils import extend_schema, OpenApiParameter
+from django_filters.rest_framework import DjangoFilterBackend
+from drf_spectacular.utils import extend_schema, inline_serializer, OpenApiParameter
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework import status
-from django.db.models import Count, Q
+from rest_framework import serializers, status
+from rest_framework.filters import OrderingFilter, SearchFilter
+from rest_framework.generics import get_object_or_404
+from rest_framework.permissions import IsAuthenticated
+from django.db import transaction
+from django.db.models import Count, Prefetch, Q
+from django.utils.decorators import method_decorator
 
+from accounts.api.permissions import IsAdminOrLibrarian
+from core.authentication import CachedJWTAuthentication
+from core.pagination import BarcodeCursorPagination, TitleCursorPagination
+
+from ..cache import cache_library_api_response, get_popular_book_ids, invalidate_library_api_cache
 from ..models import Book, BookItem, Author
 from .filters import AuthorFilter, BookFilter, BookItemFilter
 from .serializers import (
     BookSerializer,
+    BookListSerializer,
     BookCreateUpdateSerializer,
     AuthorSerializer,
     AuthorListSerializer,
     BookItemSerializer,
+    BookItemListSerializer,
     BookItemCreateUpdateSerializer,
+    BookItemBulkStatusSerializer,
 )
 
 
+@method_decorator(cache_library_api_response(), name="list")
+@method_decorator(cache_library_api_response(), name="retrieve")
 class BookViewset(ModelViewSet):
     """
     ViewSet для управления книгами в библиотечной системе.
@@ -25,9 +41,11 @@ class BookViewset(ModelViewSet):
     Включает поддержку фильтрации по различным параметрам.
     
     Features:
+        - Курсорная пагинация списка (по названию, core.pagination)
         - Фильтрация по названию, автору, ISBN, тематике
         - Оптимизированные запросы с prefetch_related для авторов
         - Различные сериализаторы для чтения и записи
+        - Кеширование list/retrieve с ETag (library.cache)
         - Публичный доступ для чтения, аутентификация для записи
         
     Endpoints:
@@ -42,13 +60,56 @@ class BookViewset(ModelViewSet):
         - subject: Поиск по тематике (exact, icontains) 
         - author__name: Поиск по имени автора (exact, icontains)
         - isbn: Точный поиск по ISBN
+        - search: Поиск по названию, ISBN и имени автора
+        - ordering: Сортировка по title
         
     Example:
         GET /library/books/?title__icontains=python&author__name=Лутц
+        GET /library/books/?search=Лутц&ordering=-title
     """
-    # Оптимизированный queryset с предзагрузкой авторов
-    queryset = Book.objects.prefetch_related("author").all()
+    # Оптимизированный queryset: только поля BookSerializer (и updated_at
+    # для кеша представлений). Авторы предзагружаются в get_queryset()
+    queryset = Book.objects.only(
+        "id", "title", "isbn", "subject", "page_counts", "updated_at",
+    )
+    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_class = BookFilter
+    search_fields = ("title", "isbn", "author__name")
+    # Курсор хранит значение поля сортировки, поэтому сортировать можно
+    # только по NOT NULL полям: по page_counts (null=True) курсор с
+    # позицией None ломал бы следующую страницу
+    ordering_fields = ("title",)
+    # Список отдается страницами без COUNT(*) и OFFSET
+    pagination_class = TitleCursorPagination
+
+    # Списочные действия отдают BookListSerializer с количеством экземпляров
+    LIST_ACTIONS = ("list", "popular")
+    # Действия, которые выводят вложенных авторов (BookSerializer)
+    AUTHOR_ACTIONS = ("list", "retrieve", "popular")
+
+    def get_queryset(self):
+        """
+        Возвращает queryset книг с аннотациями для отдельных действий.
+        
+        Returns:
+            QuerySet: Книги; для list/retrieve/popular — с предзагрузкой
+                      авторов, для списков и available_copies — с количеством
+                      экземпляров (BookQuerySet.with_copies_counts())
+        """
+        queryset = super().get_queryset()
+        if self.action in self.AUTHOR_ACTIONS:
+            # Авторы с полями AuthorSerializer, по имени (Meta.ordering
+            # у Author нет). Остальным действиям предзагрузка не нужна
+            queryset = queryset.prefetch_related(
+                Prefetch("author", queryset=Author.objects.only("id", "name", "description").order_by("name")),
+            )
+        if self.action == "available_copies":
+            # Счетчики экземпляров приходят вместе с книгой одним запросом
+            queryset = queryset.with_copies_counts()
+        elif self.action in self.LIST_ACTIONS:
+            # Один GROUP BY на всю страницу вместо COUNT на каждую книгу
+            queryset = queryset.with_copies_counts()
+        return queryset
 
     def get_serializer_class(self):
         """
@@ -56,10 +117,13 @@ class BookViewset(ModelViewSet):
         
         Returns:
             Serializer: BookCreateUpdateSerializer для записи,
-                       BookSerializer для чтения
+                       BookListSerializer для списков,
+                       BookSerializer для остальных операций чтения
         """
         if self.action in ("create", "update", "partial_update"):
             return BookCreateUpdateSerializer
+        if self.action in self.LIST_ACTIONS:
+            return BookListSerializer
         return BookSerializer
     
     @action(detail=True, methods=['get'])
@@ -73,14 +137,21 @@ class BookViewset(ModelViewSet):
             
         Returns:
             Response: Информация о количестве доступных экземпляров
+            
+        Note:
+            Книга читается через values(): ответу нужны только ID, название
+            и счетчики, поэтому экземпляр модели не создается.
         """
-        book = self.get_object()
-        available_count = book.get_available_copies()
-        total_count = book.book_items.count()
+        book = get_object_or_404(
+            self.get_queryset().values("id", "title", "available_copies_count", "total_copies_count"),
+            pk=pk,
+        )
+        available_count = book["available_copies_count"]
+        total_count = book["total_copies_count"]
         
         return Response({
-            'book_id': book.id,
-            'title': book.title,
+            'book_id': book["id"],
+            'title': book["title"],
             'available_copies': available_count,
             'total_copies': total_count,
             'availability_status': 'available' if available_count > 0 else 'unavailable'
@@ -93,13 +164,15 @@ class BookViewset(ModelViewSet):
         
         Returns:
             Response: Список популярных книг
+            
+        Note:
+            Рейтинг (ID книг) кешируется в library.cache, поэтому
+            агрегат по всем экземплярам не выполняется на каждый запрос.
+            Книги и их счетчики загружаются только для этих ID.
         """
-        popular_books = (
-            self.get_queryset()
-            .annotate(copies_count=Count('book_items'))
-            .filter(copies_count__gt=0)
-            .order_by('-copies_count')[:10]
-        )
+        book_ids = get_popular_book_ids()
+        books = self.get_queryset().filter(pk__in=book_ids).in_bulk()
+        popular_books = [books[pk] for pk in book_ids if pk in books]
         
         serializer = self.get_serializer(popular_books, many=True)
         return Response(serializer.data)
@@ -142,8 +215,15 @@ class AuthorViewset(ModelViewSet):
             QuerySet: Оптимизированный набор авторов
         """
         if self.action == "list":
-            # Для списка предзагружаем связанные книги
-            return Author.objects.prefetch_related("books").all()
+            # Для списка предзагружаем связанные книги; AuthorListSerializer
+            # выводит только их ID. Авторы сортируются по имени, книги —
+            # по названию, как до удаления Meta.ordering
+            return Author.objects.order_by("name").prefetch_related(
+                Prefetch("books", queryset=Book.objects.only("id", "title").order_by("title", "id"))
+            )
+        if self.action == "books_count":
+            # Количество книг приходит вместе с автором одним запросом
+            return Author.objects.annotate(books_count=Count("books"))
         return Author.objects.all()
 
     def get_serializer_class(self):
@@ -169,14 +249,20 @@ class AuthorViewset(ModelViewSet):
             
         Returns:
             Response: Количество книг автора
+            
+        Note:
+            Автор читается через values() вместе с аннотацией books_count,
+            без создания экземпляра модели.
         """
-        author = self.get_object()
-        books_count = author.get_books_count()
+        author = get_object_or_404(
+            self.get_queryset().values("id", "name", "books_count"),
+            pk=pk,
+        )
         
         return Response({
-            'author_id': author.id,
-            'name': author.name,
-            'books_count': books_count
+            'author_id': author["id"],
+            'name': author["name"],
+            'books_count': author["books_count"]
         })
 
 
@@ -196,6 +282,8 @@ class AuthorViewset(ModelViewSet):
         ),
     ]
 )
+@method_decorator(cache_library_api_response(), name="list")
+@method_decorator(cache_library_api_response(), name="retrieve")
 class BookItemViewSet(ModelViewSet):
     """
     ViewSet для управления экземплярами книг (вложенный ресурс).
@@ -205,8 +293,10 @@ class BookItemViewSet(ModelViewSet):
     
     Features:
         - Вложенная маршрутизация (/books/{book_id}/items/)
+        - Курсорная пагинация списка (по штрих-коду, core.pagination)
         - Фильтрация по штрих-коду, статусу, датам публикации
         - Оптимизированные запросы с select_related и prefetch_related
+        - Кеширование list/retrieve с ETag (library.cache)
         - Автоматическая привязка к родительской книге
         
     Endpoints:
@@ -215,12 +305,16 @@ class BookItemViewSet(ModelViewSet):
         - GET /library/books/{book_id}/items/{id}/ - Детали экземпляра
         - PUT/PATCH /library/books/{book_id}/items/{id}/ - Обновление
         - DELETE /library/books/{book_id}/items/{id}/ - Удаление
+        - POST /library/books/{book_id}/items/bulk_change_status/ - Смена
+          статуса нескольких экземпляров (библиотекари и администраторы)
         
     Filters:
         - barcode: Поиск по штрих-коду
         - status: Фильтр по статусу (A/B/R/L)
         - from_date: Экземпляры опубликованные после даты
         - to_date: Экземпляры опубликованные до даты
+        - search: Поиск по штрих-коду
+        - ordering: Сортировка по barcode, publication_date
         
     URL Structure:
         /library/books/1/items/ - все экземпляры книги с ID=1
@@ -230,20 +324,45 @@ class BookItemViewSet(ModelViewSet):
         book_pk из URL автоматически передается в контекст сериализатора
         для правильной привязки создаваемых экземпляров.
     """
+    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_class = BookItemFilter
+    search_fields = ("barcode",)
+    ordering_fields = ("barcode", "publication_date")
+    pagination_class = BarcodeCursorPagination
+
+    # Списочные действия отдают плоский BookItemListSerializer
+    LIST_ACTIONS = ("list", "available")
 
     def get_queryset(self):
         """
         Возвращает экземпляры книг для конкретной книги с оптимизацией.
         
+        Для списков данные книги берутся из денормализованных полей
+        экземпляра, поэтому JOIN и предзагрузка авторов не нужны.
+        
         Returns:
             QuerySet: Оптимизированный набор экземпляров конкретной книги
         """
+        queryset = BookItem.objects.filter(book=self.kwargs["book_pk"])  # Фильтруем по родительской книге
+        if self.action in self.LIST_ACTIONS:
+            # Только поля BookItemListSerializer
+            return queryset.only(
+                "id", "book", "book_title", "book_authors",
+                "barcode", "status", "publication_date",
+            )
         return (
-            BookItem.objects
+            queryset
             .select_related("book")  # Предзагружаем информацию о книге
-            .prefetch_related("book__author")  # Предзагружаем авторов
-            .filter(book=self.kwargs["book_pk"])  # Фильтруем по родительской книге
+            # Предзагружаем авторов только с полями вложенного вывода
+            .prefetch_related(
+                Prefetch("book__author", queryset=Author.objects.only("id", "name", "description").order_by("name"))
+            )
+            # Поля BookItemSerializer; денормализованные book_title и
+            # book_authors выводит только список — здесь книга вложена
+            .only(
+                "id", "barcode", "status", "publication_date",
+                "book__id", "book__title", "book__isbn", "book__subject", "book__page_counts",
+            )
         )
 
     def get_serializer_class(self):
@@ -252,10 +371,16 @@ class BookItemViewSet(ModelViewSet):
         
         Returns:
             Serializer: BookItemCreateUpdateSerializer для записи,
-                       BookItemSerializer для чтения
+                       BookItemBulkStatusSerializer для массовой смены статуса,
+                       BookItemListSerializer для списков,
+                       BookItemSerializer для остальных операций чтения
         """
         if self.action in ("create", "update", "partial_update"):
             return BookItemCreateUpdateSerializer
+        if self.action == "bulk_change_status":
+            return BookItemBulkStatusSerializer
+        if self.action in self.LIST_ACTIONS:
+            return BookItemListSerializer
         return BookItemSerializer
 
     def get_serializer_context(self):
@@ -281,7 +406,7 @@ class BookItemViewSet(ModelViewSet):
         """
         available_items = self.get_queryset().filter(
             status=BookItem.STATUS_AVAILABLE
-        )
+        ).order_by("barcode")
         
         serializer = self.get_serializer(available_items, many=True)
         return Response(serializer.data)
@@ -302,7 +427,7 @@ class BookItemViewSet(ModelViewSet):
         item = self.get_object()
         new_status = request.data.get('status')
         
-        if new_status not in dict(BookItem.STATUS_CHOICES):
+        if new_status not in BookItem.VALID_STATUSES:
             return Response(
                 {'error': 'Недопустимый статус'},
                 status=status.HTTP_400_BAD_REQUEST
@@ -311,3 +436,42 @@ class BookItemViewSet(ModelViewSet):
         item.change_status(new_status)
         serializer = self.get_serializer(item)
         return Response(serializer.data)
+
+    @extend_schema(
+        responses=inline_serializer(
+            "BookItemBulkStatusResult", {"updated": serializers.IntegerField()}
+        )
+    )
+    @action(
+        detail=False,
+        methods=['post'],
+        # Массовая запись доступна только библиотекарям и администраторам
+        authentication_classes=[CachedJWTAuthentication],
+        permission_classes=[IsAuthenticated, IsAdminOrLibrarian],
+    )
+    def bulk_change_status(self, request, book_pk=None):
+        """
+        Массовое изменение статуса экземпляров книги одним UPDATE.
+        
+        Args:
+            request: HTTP запрос с полями ids и status
+            book_pk: ID книги из URL
+            
+        Returns:
+            Response: Количество обновленных экземпляров
+            
+        Note:
+            Экземпляры других книг из ids не затрагиваются. UPDATE не
+            отправляет сигналы, поэтому кеш каталога сбрасывается явно —
+            после COMMIT, когда новые статусы видны другим запросам.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        updated = BookItem.objects.filter(
+            book_id=book_pk, pk__in=serializer.validated_data["ids"]
+        ).update(status=serializer.validated_data["status"])
+        if updated:
+            transaction.on_commit(invalidate_library_api_cache)
+        
+        return Response({'updated': updated})
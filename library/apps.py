@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class LibrarysConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'library'
+
+    def ready(self):
+        # Подключаем обработчики сигналов (синхронизация данных книги
+        # в экземплярах)
+        from . import signals  # noqa: F401
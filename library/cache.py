@@ -0,0 +1,167 @@
+import hashlib
+
+from django.core.cache import cache
+from django.db.models import Count
+from django.middleware.cache import CacheMiddleware
+from django.utils.decorators import decorator_from_middleware_with_args
+from django.views.decorators.http import etag
+from django.views.decorators.vary import vary_on_headers
+
+# Импорт модуля, а не имен: library.models импортирует этот модуль
+from . import models
+
+# Ключ версии кеша ответов API каталога и время жизни (в секундах)
+# закешированных ответов
+LIBRARY_API_CACHE_VERSION_KEY = "library:api_cache_version"
+LIBRARY_API_CACHE_PREFIX = "library:api"
+LIBRARY_API_CACHE_TIMEOUT = 60 * 5
+
+# Ключ и время жизни кеша сериализованного представления книги
+BOOK_REPRESENTATION_CACHE_KEY = "library:book:{pk}:{stamp}"
+BOOK_REPRESENTATION_CACHE_TIMEOUT = 60 * 60
+
+# Ключ и размер кешированного списка ID популярных книг
+POPULAR_BOOKS_CACHE_KEY = "library:popular_books:v{version}"
+POPULAR_BOOKS_LIMIT = 10
+
+
+def get_library_api_cache_version():
+    """
+    Возвращает текущую версию кеша ответов API каталога.
+
+    Returns:
+        int: Номер версии (создается со значением 1 при первом обращении)
+    """
+    return cache.get_or_set(LIBRARY_API_CACHE_VERSION_KEY, 1, None)
+
+
+def invalidate_library_api_cache():
+    """
+    Сбрасывает закешированные ответы API каталога.
+
+    Ответы не удаляются по одному: увеличивается версия, входящая в ключи
+    кеша и ETag, и старые записи просто истекают по таймауту.
+
+    Note:
+        Вызывается сигналами (library.signals) при изменении книг,
+        авторов и экземпляров. Код, меняющий эти модели через
+        QuerySet.update(), должен вызывать функцию сам. В обоих случаях
+        вызов регистрируется через transaction.on_commit(): до COMMIT
+        параллельный запрос закешировал бы старые данные под новой версией.
+    """
+    cache.add(LIBRARY_API_CACHE_VERSION_KEY, 1, None)
+    try:
+        cache.incr(LIBRARY_API_CACHE_VERSION_KEY)
+    except ValueError:
+        # Ключ вытеснен из кеша между add() и incr()
+        cache.set(LIBRARY_API_CACHE_VERSION_KEY, 2, None)
+
+
+def get_book_representation_cache_key(book):
+    """
+    Возвращает ключ кеша представления книги по её ID и updated_at.
+
+    Ключ меняется при каждом изменении книги или её авторов, поэтому
+    записи не удаляются, а истекают по таймауту.
+
+    Args:
+        book (Book): Книга
+
+    Returns:
+        str or None: Ключ кеша; None, если книга не сохранена или
+                     updated_at не загружен (only()/defer())
+    """
+    if book.pk is None or "updated_at" in book.get_deferred_fields():
+        return None
+    return BOOK_REPRESENTATION_CACHE_KEY.format(pk=book.pk, stamp=book.updated_at.timestamp())
+
+
+def get_popular_book_ids():
+    """
+    Возвращает ID популярных книг (по количеству экземпляров).
+
+    Агрегирование выполняется по таблице экземпляров (GROUP BY book_id,
+    без JOIN с книгами) и кешируется на LIBRARY_API_CACHE_TIMEOUT.
+    Версия кеша каталога входит в ключ, поэтому список пересчитывается
+    после изменения книг и экземпляров.
+
+    Returns:
+        list[int]: Не более POPULAR_BOOKS_LIMIT ID книг, от большего
+                   количества экземпляров к меньшему
+    """
+    def compute():
+        return list(
+            models.BookItem.objects
+            .values("book")
+            .annotate(copies=Count("id"))
+            .order_by("-copies", "book")
+            .values_list("book", flat=True)[:POPULAR_BOOKS_LIMIT]
+        )
+
+    key = POPULAR_BOOKS_CACHE_KEY.format(version=get_library_api_cache_version())
+    return cache.get_or_set(key, compute, LIBRARY_API_CACHE_TIMEOUT)
+
+
+class VersionedCacheMiddleware(CacheMiddleware):
+    """
+    CacheMiddleware, добавляющий версию кеша каталога к префиксу ключа.
+
+    Префикс вычисляется на каждый запрос, поэтому после
+    invalidate_library_api_cache() ответы строятся заново.
+    """
+
+    @property
+    def key_prefix(self):
+        return f"{self._key_prefix}:v{get_library_api_cache_version()}"
+
+    @key_prefix.setter
+    def key_prefix(self, value):
+        self._key_prefix = value
+
+
+def library_api_etag(request, *args, **kwargs):
+    """
+    Вычисляет ETag ответа по версии кеша, адресу и заголовку Accept.
+
+    Args:
+        request: HTTP запрос
+
+    Returns:
+        str: Значение ETag без кавычек
+    """
+    raw = "|".join((
+        str(get_library_api_cache_version()),
+        request.get_full_path(),
+        request.META.get("HTTP_ACCEPT", ""),
+    ))
+    return hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()
+
+
+def cache_library_api_response(timeout=LIBRARY_API_CACHE_TIMEOUT):
+    """
+    Декоратор кеширования GET-ответов API каталога (аналог cache_page).
+
+    Ответ кешируется в django.core.cache с версионированным ключом и
+    отдается с ETag: клиент с актуальным If-None-Match получает 304
+    без обращения к БД и сериализатору.
+
+    Args:
+        timeout (int): Время жизни ответа в кеше в секундах
+
+    Returns:
+        Callable: Декоратор функции представления (для методов ViewSet —
+                  через method_decorator)
+
+    Note:
+        Vary: Accept выставляется до сохранения в кеш: DRF добавляет его
+        только в finalize_response, уже после декоратора, и JSON и
+        Browsable API иначе попали бы под один ключ.
+    """
+    cache_page = decorator_from_middleware_with_args(VersionedCacheMiddleware)(
+        page_timeout=timeout, key_prefix=LIBRARY_API_CACHE_PREFIX,
+    )
+
+    def decorator(view_func):
+        return etag(library_api_etag)(cache_page(vary_on_headers("Accept")(view_func)))
+
+    return decorator
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.6 on 2026-10-14 18:27
+
+from django.db import migrations
+
+# Триграммные GIN-индексы для фильтров icontains (BookFilter, AuthorFilter).
+# Django строит icontains в PostgreSQL как UPPER(col) LIKE UPPER(%s),
+# поэтому индексируется выражение UPPER(col).
+TRIGRAM_INDEXES = (
+    ("library_book_title_trgm", "library_book", "title"),
+    ("library_book_subject_trgm", "library_book", "subject"),
+    ("library_author_name_trgm", "library_author", "name"),
+)
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" '
+            f'USING gin ((UPPER("{column}"::text)) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, _table, _column in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{name}"')
+
+
+class Migration(migrations.Migration):
+    """
+    Убирает дублирующий индекс по ISBN и добавляет триграммные индексы.
+
+    ISBN уже проиндексирован ограничением unique=True. Триграммные
+    индексы создаются только в PostgreSQL и не входят в состояние
+    моделей: GinIndex в Meta.indexes сломал бы миграции на других СУБД.
+    """
+
+    dependencies = [
+        ('library', '0003_alter_author_options_alter_book_options_and_more'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='book',
+            name='library_boo_isbn_951e8b_idx',
+        ),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.6 on 2026-10-14 18:33
+
+from django.db import migrations, models
+
+
+# Длина поля BookItem.book_authors на момент миграции
+BOOK_AUTHORS_MAX_LENGTH = 1024
+
+
+def backfill_book_fields(apps, schema_editor):
+    Book = apps.get_model('library', 'Book')
+    for book in Book.objects.prefetch_related('author').iterator(chunk_size=500):
+        names = ", ".join(author.name for author in book.author.all())
+        if len(names) > BOOK_AUTHORS_MAX_LENGTH:
+            names = names[:BOOK_AUTHORS_MAX_LENGTH - 1] + "…"
+        book.book_items.update(book_title=book.title, book_authors=names)
+
+
+class Migration(migrations.Migration):
+    """
+    Денормализует название и авторов книги в BookItem.
+
+    Поля заполняются для уже существующих экземпляров; дальше их
+    поддерживают сигналы library.signals.
+    """
+
+    dependencies = [
+        ('library', '0004_book_author_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bookitem',
+            name='book_authors',
+            field=models.CharField(blank=True, default='', editable=False, help_text='Копия имен авторов книги через запятую', max_length=1024, verbose_name='Авторы книги'),
+        ),
+        migrations.AddField(
+            model_name='bookitem',
+            name='book_title',
+            field=models.CharField(blank=True, default='', editable=False, help_text='Копия Book.title для быстрых списков экземпляров', max_length=255, verbose_name='Название книги'),
+        ),
+        migrations.RunPython(backfill_book_fields, migrations.RunPython.noop),
+    ]
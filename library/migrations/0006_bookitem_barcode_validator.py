@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-14 18:49
+
+import library.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0005_bookitem_book_title_book_authors'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='bookitem',
+            name='barcode',
+            field=models.CharField(help_text='Уникальный штрих-код для идентификации экземпляра', max_length=15, unique=True, validators=[library.models.BarcodeValidator()], verbose_name='Штрих-код'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-14 18:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0006_bookitem_barcode_validator'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bookitem',
+            index=models.Index(fields=['book', 'status'], name='bookitem_book_status_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.6 on 2026-10-14 19:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """
+    Удаляет устаревшую модель Borrowing из состояния ORM.
+
+    Таблица library_borrowing_deprecated со старыми данными остается в БД.
+    Сначала снимаются ограничения внешних ключей (db_constraint=False):
+    без модели Django больше не каскадирует удаление на эту таблицу, и
+    ограничения запретили бы удалять экземпляры и пользователей со
+    старыми выдачами.
+    """
+
+    dependencies = [
+        ('library', '0007_bookitem_book_status_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='borrowing',
+            name='book',
+            field=models.ForeignKey(db_constraint=False, help_text='УСТАРЕЛО: Используйте BorrowedBook.book_item', on_delete=django.db.models.deletion.DO_NOTHING, to='library.bookitem', verbose_name='Экземпляр книги'),
+        ),
+        migrations.AlterField(
+            model_name='borrowing',
+            name='user',
+            field=models.ForeignKey(db_constraint=False, help_text='УСТАРЕЛО: Используйте BorrowedBook.borrower', on_delete=django.db.models.deletion.DO_NOTHING, to=settings.AUTH_USER_MODEL, verbose_name='Пользователь'),
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.DeleteModel(name='Borrowing'),
+            ],
+        ),
+    ]
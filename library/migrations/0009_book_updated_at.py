@@ -0,0 +1,20 @@
+# Generated by Django 5.2.6 on 2026-10-14 19:20
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0008_remove_borrowing_from_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, help_text='Время последнего изменения книги или её авторов', verbose_name='Обновлено'),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.6 on 2026-10-14 19:03
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Убирает дублирующий индекс по штрих-коду экземпляра.
+
+    Штрих-код уже проиндексирован ограничением unique=True.
+    """
+
+    dependencies = [
+        ('library', '0009_book_updated_at'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='bookitem',
+            name='library_boo_barcode_f8e9e7_idx',
+        ),
+    ]
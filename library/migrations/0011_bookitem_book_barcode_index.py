@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-14 19:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0010_remove_bookitem_barcode_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bookitem',
+            index=models.Index(fields=['book', 'barcode'], name='bookitem_book_barcode_idx'),
+        ),
+    ]
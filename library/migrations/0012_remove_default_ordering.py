@@ -0,0 +1,25 @@
+# Generated by Django 5.2.6 on 2026-10-14 19:05
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0011_bookitem_book_barcode_index'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='author',
+            options={'verbose_name': 'Автор', 'verbose_name_plural': 'Авторы'},
+        ),
+        migrations.AlterModelOptions(
+            name='book',
+            options={'verbose_name': 'Книга', 'verbose_name_plural': 'Книги'},
+        ),
+        migrations.AlterModelOptions(
+            name='bookitem',
+            options={'verbose_name': 'Экземпляр книги', 'verbose_name_plural': 'Экземпляры книг'},
+        ),
+    ]
@@ -1,6 +1,42 @@
-from django.db import models
-from django.contrib.auth import get_user_model
+from django.db import connections, models, transaction
+from django.contrib.postgres.aggregates import StringAgg
+from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, RegexValidator
+from django.utils.deconstruct import deconstructible
+
+# Импорт модуля, а не имен: library.cache обращается к моделям
+from . import cache as library_cache
+
+# Валидатор ISBN-10/ISBN-13 (с префиксом "ISBN" и разделителями).
+# Один экземпляр на процесс: RegexValidator компилирует шаблон при первом
+# вызове. Шаблон использует lookahead, поэтому остается на модуле re.
+ISBN_PATTERN = r'^(?:ISBN(?:-1[03])?:? )?(?=[0-9X]{10}$|(?=(?:[0-9]+[- ]){3})[- 0-9X]{13}$|97[89][0-9]{10}$|(?=(?:[0-9]+[- ]){4})[- 0-9]{17}$)(?:97[89][- ]?)?[0-9]{1,5}[- ]?[0-9]+[- ]?[0-9]+[- ]?[0-9X]$'
+ISBN_VALIDATOR = RegexValidator(
+    regex=ISBN_PATTERN,
+    message='Введите корректный ISBN номер'
+)
+
+
+@deconstructible(path="library.models.BarcodeValidator")
+class BarcodeValidator(RegexValidator):
+    """
+    Валидатор штрих-кода экземпляра: ровно 13 цифр ASCII.
+    
+    Проверка выполняется строковыми методами без регулярного выражения.
+    regex оставлен, чтобы формат попадал в API-схему (pattern).
+    """
+    regex = r'^[0-9]{13}$'
+    message = 'Штрих-код должен состоять из 13 цифр'
+    length = 13
+
+    def __call__(self, value):
+        value = str(value)
+        # isascii(): isdigit() пропускает и не-ASCII цифры ("١", "²")
+        if not (len(value) == self.length and value.isascii() and value.isdigit()):
+            raise ValidationError(self.message, code=self.code, params={"value": value})
+
+
+BARCODE_VALIDATOR = BarcodeValidator()
 
 
 class Author(models.Model):
@@ -47,22 +83,102 @@ class Author(models.Model):
         """
         Возвращает количество книг, написанных автором.
         
+        Без дополнительного запроса используются аннотация books_count
+        (annotate(books_count=Count("books"))) или предзагруженные
+        prefetch_related("books"). Иначе выполняется COUNT.
+        
         Returns:
             int: Количество книг автора
         """
+        books_count = getattr(self, "books_count", None)
+        if books_count is not None:
+            return books_count
+        if "books" in getattr(self, "_prefetched_objects_cache", {}):
+            return len(self.books.all())
         return self.books.count()
 
     class Meta:
         verbose_name = "Автор"
         verbose_name_plural = "Авторы"
-        # Сортировка по имени автора
-        ordering = ['name']
-        # Индекс для быстрого поиска по имени
+        # Порядок по имени задают AuthorViewset.get_queryset() и Prefetch
+        # авторов книг; get_books_count() и фильтры обходятся без ORDER BY
+        # Индекс для быстрого поиска по имени (для icontains в PostgreSQL
+        # дополнительно создается триграммный GIN-индекс, см. миграцию
+        # 0004_book_author_trigram_indexes)
         indexes = [
             models.Index(fields=['name']),
         ]
 
 
+class BookQuerySet(models.QuerySet):
+    """
+    QuerySet книг с аннотациями количества экземпляров.
+    """
+
+    def with_copies_counts(self):
+        """
+        Аннотирует количество доступных и всех экземпляров одним запросом.
+        
+        Returns:
+            QuerySet: Книги с аннотациями available_copies_count и
+                      total_copies_count (условная агрегация по book_items)
+                      
+        Note:
+            distinct=True: фильтр по авторам (author__name) добавляет
+            JOIN со связью M2M, и без него экземпляры считались бы
+            по разу на каждого подходящего автора.
+        """
+        return self.annotate(
+            available_copies_count=models.Count(
+                "book_items",
+                filter=models.Q(book_items__status=BookItem.STATUS_AVAILABLE),
+                distinct=True,
+            ),
+            total_copies_count=models.Count("book_items", distinct=True),
+        )
+
+    def available(self, value=True):
+        """
+        Отбирает книги, у которых есть (или нет) доступные экземпляры.
+        
+        Проверка выполняется подзапросом EXISTS: БД останавливается на
+        первом доступном экземпляре, а не считает все (COUNT).
+        
+        Args:
+            value (bool): True — есть доступные экземпляры, False — нет
+            
+        Returns:
+            QuerySet: Отфильтрованные книги
+        """
+        has_available = models.Exists(
+            BookItem.objects.filter(book=models.OuterRef("pk"), status=BookItem.STATUS_AVAILABLE)
+        )
+        return self.filter(has_available if value else ~has_available)
+
+    def with_authors_names(self):
+        """
+        Подготавливает имена авторов для Book.get_authors_names().
+        
+        В PostgreSQL имена собираются в SQL (STRING_AGG, аннотация
+        authors_names) тем же запросом, что и книги. В остальных СУБД
+        авторы предзагружаются и соединяются в Python. В обоих случаях
+        имена идут по алфавиту, а однофамильцы не схлопываются.
+        
+        Returns:
+            QuerySet: Книги с аннотацией authors_names или с
+                      предзагруженными авторами (по имени)
+        """
+        if connections[self.db].vendor != "postgresql":
+            return self.prefetch_related(
+                models.Prefetch("author", queryset=Author.objects.order_by("name"))
+            )
+        return self.annotate(
+            authors_names=StringAgg(
+                "author__name", ", ", order_by="author__name", default="",
+            )
+        )
+
+
 class Book(models.Model):
     """
     Модель книги в библиотечной системе.
@@ -77,6 +193,12 @@ class Book(models.Model):
         author (ManyToManyField): Авторы книги
         subject (CharField): Тематическая категория книги
         page_counts (IntegerField): Количество страниц в книге
+        updated_at (DateTimeField): Время последнего изменения
+        
+    Managers:
+        objects: BookQuerySet (available() для отбора по наличию экземпляров,
+                 with_copies_counts() для подсчета экземпляров в SQL,
+                 with_authors_names() для имен авторов одной строкой)
         
     Methods:
         __str__(): Возвращает строковое представление книги
@@ -96,12 +218,7 @@ class Book(models.Model):
         unique=True,
         verbose_name="ISBN",
         help_text="Международный стандартный номер книги",
-        validators=[
-            RegexValidator(
-                regex=r'^(?:ISBN(?:-1[03])?:? )?(?=[0-9X]{10}$|(?=(?:[0-9]+[- ]){3})[- 0-9X]{13}$|97[89][0-9]{10}$|(?=(?:[0-9]+[- ]){4})[- 0-9]{17}$)(?:97[89][- ]?)?[0-9]{1,5}[- ]?[0-9]+[- ]?[0-9]+[- ]?[0-9X]$',
-                message='Введите корректный ISBN номер'
-            )
-        ]
+        validators=[ISBN_VALIDATOR]
     )
     
     # Связь с авторами (многие ко многим)
@@ -128,6 +245,16 @@ class Book(models.Model):
         validators=[MinValueValidator(1, message="Количество страниц должно быть больше 0")]
     )
 
+    # Время изменения книги или её авторов (обновляют сигналы
+    # library.signals); входит в ключ кеша представления книги
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Обновлено",
+        help_text="Время последнего изменения книги или её авторов"
+    )
+
+    objects = BookQuerySet.as_manager()
+
     def __str__(self):
         """
         Возвращает строковое представление книги.
@@ -141,29 +268,69 @@ class Book(models.Model):
         """
         Возвращает количество доступных для выдачи экземпляров книги.
         
+        Без дополнительного запроса используются аннотация
+        Book.objects.with_copies_counts() или предзагруженные
+        prefetch_related("book_items"). Иначе выполняется COUNT.
+        
         Returns:
             int: Количество доступных экземпляров
         """
+        available = getattr(self, "available_copies_count", None)
+        if available is not None:
+            return available
+        if "book_items" in getattr(self, "_prefetched_objects_cache", {}):
+            # filter() по предзагруженному менеджеру сбросил бы кеш
+            return sum(
+                1 for item in self.book_items.all()
+                if item.status == BookItem.STATUS_AVAILABLE
+            )
         return self.book_items.filter(status=BookItem.STATUS_AVAILABLE).count()
     
     def get_authors_names(self):
         """
         Возвращает имена всех авторов книги через запятую.
         
+        Если книга получена через Book.objects.with_authors_names()
+        в PostgreSQL, используется аннотация без дополнительного запроса.
+        
         Returns:
             str: Имена авторов, разделенные запятой
         """
-        return ", ".join([author.name for author in self.author.all()])
+        names = getattr(self, "authors_names", None)
+        if names is not None:
+            return names
+        if "author" in getattr(self, "_prefetched_objects_cache", {}):
+            # Порядок задает queryset предзагрузки (with_authors_names)
+            authors = self.author.all()
+        else:
+            authors = self.author.order_by("name")
+        return ", ".join(author.name for author in authors)
+
+    def sync_book_items(self):
+        """
+        Обновляет денормализованные название и авторов у экземпляров книги.
+        
+        Вызывается обработчиками сигналов (library.signals) при изменении
+        книги, её авторов или связи книга-автор.
+        
+        Returns:
+            int: Количество обновленных экземпляров
+        """
+        return self.book_items.update(
+            book_title=self.title,
+            book_authors=truncate_book_authors(self.get_authors_names()),
+        )
 
     class Meta:
         verbose_name = "Книга"
         verbose_name_plural = "Книги"
-        # Сортировка по названию
-        ordering = ['title']
-        # Индексы для ускорения поиска
+        # Алфавитный порядок каталога дает TitleCursorPagination
+        # Индексы для ускорения поиска. ISBN отдельно не индексируется:
+        # unique=True уже создает уникальный индекс. Для icontains по
+        # title/subject в PostgreSQL есть триграммные GIN-индексы
+        # (миграция 0004_book_author_trigram_indexes).
         indexes = [
             models.Index(fields=['title']),
-            models.Index(fields=['isbn']),
             models.Index(fields=['subject']),
         ]
 
@@ -178,6 +345,8 @@ class BookItem(models.Model):
     
     Attributes:
         book (ForeignKey): Связь с моделью книги
+        book_title (CharField): Копия названия книги (денормализация)
+        book_authors (CharField): Копия имен авторов книги (денормализация)
         barcode (CharField): Уникальный штрих-код экземпляра
         status (CharField): Текущий статус экземпляра
         publication_date (DateField): Дата публикации данного издания
@@ -200,6 +369,8 @@ class BookItem(models.Model):
         (STATUS_RESERVED, "Зарезервирована"),
         (STATUS_LOST, "Утеряна"),
     )
+    # Допустимые коды статусов: строится один раз при определении класса
+    VALID_STATUSES = frozenset(code for code, _label in STATUS_CHOICES)
     
     # Связь с моделью книги (многие экземпляры к одной книге)
     book = models.ForeignKey(
@@ -209,6 +380,26 @@ class BookItem(models.Model):
         verbose_name="Книга",
         help_text="Книга, к которой относится данный экземпляр"
     )
+
+    # Денормализованные данные книги для списков экземпляров без JOIN.
+    # Заполняются при создании экземпляра и синхронизируются сигналами
+    # (library.signals) при изменении книги и её авторов.
+    book_title = models.CharField(
+        max_length=255,
+        blank=True,
+        default="",
+        editable=False,
+        verbose_name="Название книги",
+        help_text="Копия Book.title для быстрых списков экземпляров"
+    )
+    book_authors = models.CharField(
+        max_length=1024,
+        blank=True,
+        default="",
+        editable=False,
+        verbose_name="Авторы книги",
+        help_text="Копия имен авторов книги через запятую"
+    )
     
     # Уникальный штрих-код экземпляра
     barcode = models.CharField(
@@ -216,12 +407,7 @@ class BookItem(models.Model):
         unique=True,
         verbose_name="Штрих-код",
         help_text="Уникальный штрих-код для идентификации экземпляра",
-        validators=[
-            RegexValidator(
-                regex=r'^[0-9]{13}$',
-                message='Штрих-код должен состоять из 13 цифр'
-            )
-        ]
+        validators=[BARCODE_VALIDATOR]
     )
     
     # Текущий статус экземпляра
@@ -257,22 +443,30 @@ class BookItem(models.Model):
         """
         return self.status in [self.STATUS_AVAILABLE, self.STATUS_RESERVED]
 
-    def change_status(self, to: str):
+    def change_status(self, to: str, invalidate_cache: bool = True):
         """
         Изменяет статус экземпляра книги.
         
         Args:
             to (str): Новый статус из доступных вариантов
+            invalidate_cache (bool): Сбросить кеш API каталога после COMMIT;
+                False — если вызывающий код сбрасывает его сам (например,
+                один раз после серии изменений)
             
         Raises:
             ValueError: Если передан недопустимый статус
+            
+        Note:
+            Статус записывается одним UPDATE без save(), поэтому сигналы
+            pre_save/post_save не отправляются.
         """
-        valid_statuses = [choice[0] for choice in self.STATUS_CHOICES]
-        if to not in valid_statuses:
+        if to not in self.VALID_STATUSES:
             raise ValueError(f"Недопустимый статус: {to}")
             
+        type(self).objects.filter(pk=self.pk).update(status=to)
         self.status = to
-        self.save(update_fields=["status"])
+        if invalidate_cache:
+            transaction.on_commit(library_cache.invalidate_library_api_cache)
     
     def get_borrower(self):
         """
@@ -300,71 +494,39 @@ class BookItem(models.Model):
     class Meta:
         verbose_name = "Экземпляр книги"
         verbose_name_plural = "Экземпляры книг"
-        # Сортировка по штрих-коду
-        ordering = ['barcode']
+        # Список экземпляров упорядочен BarcodeCursorPagination и
+        # BookItemViewSet.available; подсчеты по статусу идут без сортировки
         # Индексы для быстрого поиска
+        # Поиск по штрих-коду использует индекс ограничения unique=True
         indexes = [
-            models.Index(fields=['barcode']),
             models.Index(fields=['status']),
             models.Index(fields=['publication_date']),
+            # Подсчет экземпляров книги по статусу (get_available_copies,
+            # with_copies_counts) читает только этот индекс
+            models.Index(fields=['book', 'status'], name='bookitem_book_status_idx'),
+            # Курсорная пагинация экземпляров книги (BarcodeCursorPagination)
+            models.Index(fields=['book', 'barcode'], name='bookitem_book_barcode_idx'),
         ]
 
 
-User = get_user_model()
-
-
-class Borrowing(models.Model):
+def truncate_book_authors(names):
     """
-    УСТАРЕВШАЯ модель выдачи книги.
-    
-    ВНИМАНИЕ: Эта модель больше не используется в системе!
-    Вместо неё используется модель BorrowedBook из приложения borrowing.
-    
-    Оставлена для совместимости со старыми данными.
-    Рекомендуется к удалению после миграции всех данных.
+    Обрезает имена авторов до длины поля BookItem.book_authors.
     
-    Attributes:
-        user (ForeignKey): Пользователь, взявший книгу
-        book (ForeignKey): Экземпляр выданной книги  
-        borrow_date (DateTimeField): Дата и время выдачи
-        return_date (DateTimeField): Дата и время возврата
+    Args:
+        names (str): Имена авторов через запятую (Book.get_authors_names())
+        
+    Returns:
+        str: Строка не длиннее max_length поля; обрезанная строка
+             заканчивается многоточием
     """
-    # УСТАРЕВШИЕ ПОЛЯ - НЕ ИСПОЛЬЗОВАТЬ!
-    user = models.ForeignKey(
-        User,
-        on_delete=models.CASCADE,
-        verbose_name="Пользователь",
-        help_text="УСТАРЕЛО: Используйте BorrowedBook.borrower"
-    )
-    book = models.ForeignKey(
-        BookItem,
-        on_delete=models.CASCADE,
-        verbose_name="Экземпляр книги",
-        help_text="УСТАРЕЛО: Используйте BorrowedBook.book_item"
-    )
-    borrow_date = models.DateTimeField(
-        auto_now_add=True,
-        verbose_name="Дата выдачи",
-        help_text="УСТАРЕЛО: Используйте BorrowedBook.borrowed_date"
-    )
-    return_date = models.DateTimeField(
-        null=True,
-        blank=True,
-        verbose_name="Дата возврата",
-        help_text="УСТАРЕЛО: Логика возврата изменена в BorrowedBook"
-    )
+    max_length = BookItem._meta.get_field("book_authors").max_length
+    if len(names) <= max_length:
+        return names
+    return names[:max_length - 1] + "…"
 
-    def __str__(self):
-        """
-        Возвращает строковое представление устаревшей выдачи.
-        
-        Returns:
-            str: Строка с предупреждением об устаревшей модели
-        """
-        return f"[УСТАРЕЛО] Выдача: {self.book.book.title} → {self.user.username}"
 
-    class Meta:
-        verbose_name = "Выдача книги (устарело)"
-        verbose_name_plural = "Выдачи книг (устарело)"
-        # Помечаем как устаревшую
-        db_table = 'library_borrowing_deprecated'
+# Устаревшая модель Borrowing удалена из ORM (миграция
+# 0008_remove_borrowing_from_state). Таблица library_borrowing_deprecated
+# со старыми данными остается в БД без внешних ключей; актуальные выдачи —
+# borrowing.BorrowedBook.
@@ -0,0 +1,150 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import invalidate_library_api_cache
+from .models import Author, Book, BookItem, truncate_book_authors
+
+
+def touch_books(book_ids):
+    """
+    Обновляет updated_at книг, у которых изменились авторы.
+    
+    Представление книги включает авторов, поэтому его кеш
+    (library.cache) должен сменить ключ.
+    
+    Args:
+        book_ids (Iterable[int]): ID книг
+    """
+    Book.objects.filter(pk__in=book_ids).update(updated_at=timezone.now())
+
+
+def sync_books(book_ids):
+    """
+    Синхронизирует денормализованные данные экземпляров указанных книг.
+    
+    Args:
+        book_ids (Iterable[int]): ID книг
+    """
+    book_ids = list(book_ids)
+    touch_books(book_ids)
+    for book in Book.objects.filter(pk__in=book_ids).with_authors_names():
+        book.sync_book_items()
+
+
+@receiver(pre_save, sender=BookItem)
+def fill_book_item_denormalized_fields(sender, instance, raw=False, **kwargs):
+    """
+    Заполняет название и авторов книги у создаваемого экземпляра.
+    
+    Args:
+        sender: Модель BookItem
+        instance (BookItem): Сохраняемый экземпляр
+        raw (bool): True при загрузке фикстур (данные уже заполнены)
+    """
+    if raw or not instance._state.adding:
+        return
+    book = instance.book
+    instance.book_title = book.title
+    instance.book_authors = truncate_book_authors(book.get_authors_names())
+
+
+@receiver(post_save, sender=Book)
+def sync_book_title(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Обновляет название книги у её экземпляров.
+    
+    Args:
+        sender: Модель Book
+        instance (Book): Сохраненная книга
+        created (bool): True для новой книги (экземпляров еще нет)
+        update_fields (frozenset): Обновленные поля, если переданы в save()
+    """
+    if created or (update_fields is not None and "title" not in update_fields):
+        return
+    instance.book_items.update(book_title=instance.title)
+
+
+@receiver(m2m_changed, sender=Book.author.through)
+def sync_book_authors(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Обновляет авторов у экземпляров при изменении связи книга-автор.
+    
+    Args:
+        sender: Промежуточная модель Book.author
+        instance (Book | Author): Книга (прямая связь) или автор (обратная)
+        action (str): Тип изменения (pre_clear, post_add, ...)
+        reverse (bool): True, если изменение идет со стороны автора
+        pk_set (set): ID добавленных/удаленных объектов
+    """
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            touch_books([instance.pk])
+            instance.sync_book_items()
+        return
+
+    if action == "pre_clear":
+        # После очистки связи книги автора уже не найти
+        instance._cleared_book_ids = list(instance.books.values_list("pk", flat=True))
+    elif action in ("post_add", "post_remove"):
+        sync_books(pk_set)
+    elif action == "post_clear":
+        sync_books(getattr(instance, "_cleared_book_ids", ()))
+
+
+@receiver(post_save, sender=Author)
+def sync_author_name(sender, instance, created, **kwargs):
+    """
+    Обновляет имена авторов у экземпляров книг переименованного автора.
+    
+    Args:
+        sender: Модель Author
+        instance (Author): Сохраненный автор
+        created (bool): True для нового автора (книг еще нет)
+    """
+    if not created:
+        sync_books(instance.books.values_list("pk", flat=True))
+
+
+@receiver(pre_delete, sender=Author)
+def remember_author_books(sender, instance, **kwargs):
+    """
+    Запоминает книги удаляемого автора.
+    
+    Каскадное удаление строк связи не отправляет m2m_changed.
+    """
+    instance._deleted_book_ids = list(instance.books.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=Author)
+def sync_deleted_author(sender, instance, **kwargs):
+    """
+    Убирает удаленного автора из данных экземпляров его книг.
+    """
+    sync_books(getattr(instance, "_deleted_book_ids", ()))
+
+
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+@receiver(post_save, sender=BookItem)
+@receiver(post_delete, sender=BookItem)
+@receiver(post_save, sender=Author)
+@receiver(post_delete, sender=Author)
+@receiver(m2m_changed, sender=Book.author.through)
+def invalidate_api_cache(sender, **kwargs):
+    """
+    Сбрасывает кеш ответов API каталога при изменении книг,
+    экземпляров, авторов и связи книга-автор.
+    
+    Args:
+        sender: Измененная модель
+        
+    Note:
+        Сигналы отправляются внутри транзакции сохранения, поэтому сброс
+        откладывается до COMMIT: иначе параллельный GET успел бы
+        закешировать старые строки под новой версией.
+    """
+    if kwargs.get("raw") or kwargs.get("action", "post_").startswith("pre_"):
+        return
+    transaction.on_commit(invalidate_library_api_cache)
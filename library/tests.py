@@ -1,43 +1,63 @@
 from datetime import date
 
-from rest_framework.test import APITestCase, APIClient
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
 from rest_framework import status
 
 from core.models import User
-from .models import Author, Book, BookItem
+from core.testing import CacheClearMixin, bulk_create_users
+from .api.filters import BookFilter
+from .cache import get_library_api_cache_version, invalidate_library_api_cache
+from .api.serializers import BookSerializer
+from .models import BARCODE_VALIDATOR, ISBN_VALIDATOR, Author, Book, BookItem
 
 
-class LibraryApiTests(APITestCase):
-    def setUp(self):
-        self.user = User.objects.create_user(username="usr", email="usr@example.com", password="User_pass_123!")
-        self.admin = User.objects.create_user(username="admin", email="admin@example.com", password="Admin_pass_123!")
-        self.admin.is_staff = True
-        self.admin.save(update_fields=["is_staff"])
-        self.client = APIClient()
+class LibraryApiTests(CacheClearMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, cls.admin = bulk_create_users(
+            User(username="usr", email="usr@example.com", password="User_pass_123!"),
+            User(username="admin", email="admin@example.com", password="Admin_pass_123!", is_staff=True),
+        )
 
-        self.author1 = Author.objects.create(name="Пушкин")
-        self.author2 = Author.objects.create(name="Лермонтов")
+        cls.author1, cls.author2 = Author.objects.bulk_create([
+            Author(name="Пушкин"),
+            Author(name="Лермонтов"),
+        ])
+        cls.book1, cls.book2 = Book.objects.bulk_create([
+            Book(title="Книга А", isbn="978-5-17-111111-1", subject="Поэзия", page_counts=120),
+            Book(title="Книга Б", isbn="978-5-17-222222-2", subject="Роман", page_counts=300),
+        ])
+        # Через таблицу связи, а не author.add(): обработчики m2m_changed
+        # (touch_books, синхронизация экземпляров) для новых книг не нужны
+        Book.author.through.objects.bulk_create([
+            Book.author.through(book_id=cls.book1.pk, author_id=cls.author1.pk),
+            Book.author.through(book_id=cls.book2.pk, author_id=cls.author2.pk),
+        ])
 
-        self.book1 = Book.objects.create(title="Книга А", isbn="978-5-17-111111-1", subject="Поэзия", page_counts=120)
-        self.book1.author.add(self.author1)
-        self.book2 = Book.objects.create(title="Книга Б", isbn="978-5-17-222222-2", subject="Роман", page_counts=300)
-        self.book2.author.add(self.author2)
-
-        self.item1 = BookItem.objects.create(book=self.book1, barcode="BC-1", status=BookItem.STATUS_AVAILABLE, publication_date=date(2010, 1, 1))
-        self.item2 = BookItem.objects.create(book=self.book2, barcode="BC-2", status=BookItem.STATUS_AVAILABLE, publication_date=date(2015, 6, 1))
+        # bulk_create не вызывает сигналы, поэтому денормализованные поля
+        # экземпляров заполняются явно
+        cls.item1, cls.item2 = BookItem.objects.bulk_create([
+            BookItem(book=cls.book1, book_title="Книга А", book_authors="Пушкин", barcode="BC-1",
+                     status=BookItem.STATUS_AVAILABLE, publication_date=date(2010, 1, 1)),
+            BookItem(book=cls.book2, book_title="Книга Б", book_authors="Лермонтов", barcode="BC-2",
+                     status=BookItem.STATUS_AVAILABLE, publication_date=date(2015, 6, 1)),
+        ])
 
     def test_list_books(self):
         url = "/library/books/"
         resp = self.client.get(url)
         self.assertEqual(resp.status_code, status.HTTP_200_OK, msg="Список книг должен возвращать 200")
-        self.assertGreaterEqual(len(resp.data), 2, msg="В списке должно быть минимум 2 книги")
+        self.assertGreaterEqual(len(resp.data["results"]), 2, msg="В списке должно быть минимум 2 книги")
 
     def test_filter_books_by_title(self):
         url = "/library/books/?title=Книга А"
         resp = self.client.get(url)
         self.assertEqual(resp.status_code, status.HTTP_200_OK, msg="Фильтрация по title должна возвращать 200")
-        self.assertEqual(len(resp.data), 1, msg="Фильтр по названию должен вернуть одну книгу")
-        self.assertEqual(resp.data[0]["title"], "Книга А")
+        self.assertEqual(len(resp.data["results"]), 1, msg="Фильтр по названию должен вернуть одну книгу")
+        self.assertEqual(resp.data["results"][0]["title"], "Книга А")
 
     def test_list_authors(self):
         url = "/library/authors/"
@@ -49,7 +69,7 @@ class LibraryApiTests(APITestCase):
         url = f"/library/books/{self.book1.id}/items/"
         resp = self.client.get(url)
         self.assertEqual(resp.status_code, status.HTTP_200_OK, msg="Вложенный список экземпляров должен возвращать 200")
-        self.assertEqual(len(resp.data), 1, msg="Должен быть один экземпляр для Книга А")
+        self.assertEqual(len(resp.data["results"]), 1, msg="Должен быть один экземпляр для Книга А")
 
     def test_admin_can_create_book(self):
         self.client.force_authenticate(user=self.admin)
@@ -77,4 +97,297 @@ class LibraryApiTests(APITestCase):
         resp = self.client.put(url, payload, format="json")
         self.assertEqual(resp.status_code, status.HTTP_200_OK, msg="Админ должен уметь обновлять книгу")
 
+    def test_list_books_query_count(self):
+        # Книги + предзагрузка авторов, независимо от числа книг
+        with self.assertNumQueries(2):
+            resp = self.client.get("/library/books/")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data["results"][0]["author"][0]["name"], "Пушкин")
+
+    def test_nested_book_items_query_count(self):
+        BookItem.objects.create(book=self.book1, barcode="BC-3", status=BookItem.STATUS_AVAILABLE, publication_date=date(2012, 1, 1))
+        # Данные книги денормализованы в экземпляре: один запрос без JOIN
+        with self.assertNumQueries(1):
+            resp = self.client.get(f"/library/books/{self.book1.id}/items/")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(resp.data["results"]), 2)
+        self.assertEqual(resp.data["results"][0]["book_title"], "Книга А")
+        self.assertEqual(resp.data["results"][0]["book_authors"], "Пушкин")
+
+    def test_book_item_authors_truncated_to_field_length(self):
+        max_length = BookItem._meta.get_field("book_authors").max_length
+        self.author1.name = "А" * 200
+        self.author1.save()
+        for i in range(5):
+            self.book1.author.add(Author.objects.create(name=f"{i}" * 200))
+        self.item1.refresh_from_db(fields=["book_authors"])
+        self.assertEqual(len(self.item1.book_authors), max_length)
+        self.assertTrue(self.item1.book_authors.endswith("…"))
+
+        item = BookItem.objects.create(book=self.book1, barcode="BC-3", status=BookItem.STATUS_AVAILABLE, publication_date=date(2012, 1, 1))
+        self.assertEqual(item.book_authors, self.item1.book_authors)
+
+    def test_book_item_denormalized_fields_follow_book_changes(self):
+        self.book1.title = "Книга А2"
+        self.book1.save()
+        self.book1.author.add(self.author2)
+        self.item1.refresh_from_db()
+        self.assertEqual(self.item1.book_title, "Книга А2")
+        self.assertEqual(self.item1.book_authors, "Лермонтов, Пушкин")
+
+        # Обратная сторона связи и удаление автора
+        self.author1.books.clear()
+        self.author2.name = "Лермонтов М."
+        self.author2.save()
+        self.item1.refresh_from_db()
+        self.assertEqual(self.item1.book_authors, "Лермонтов М.")
+        self.author2.delete()
+        self.item1.refresh_from_db()
+        self.assertEqual(self.item1.book_authors, "")
+
+        resp = self.client.get(f"/library/books/{self.book1.id}/items/{self.item1.id}/")
+        self.assertEqual(resp.data["book"]["title"], "Книга А2")
+
+    def test_filter_books_by_author_icontains_reuses_form_class(self):
+        resp = self.client.get("/library/books/", {"author__name__icontains": "Пуш"})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual([book["title"] for book in resp.data["results"]], ["Книга А"])
+        self.assertIs(BookFilter().get_form_class(), BookFilter().get_form_class())
+
+    def test_book_list_is_cached_until_catalog_changes(self):
+        self.client.get("/library/books/")
+        with self.assertNumQueries(0):
+            resp = self.client.get("/library/books/")
+        self.assertEqual(resp.data["results"][0]["title"], "Книга А")
+
+        self.book1.title = "Книга А2"
+        # Кеш сбрасывается после COMMIT (transaction.on_commit)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book1.save()
+        resp = self.client.get("/library/books/")
+        self.assertEqual(resp.data["results"][0]["title"], "Книга А2")
+
+    def test_cache_invalidated_only_after_commit(self):
+        version = get_library_api_cache_version()
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.book1.title = "Книга А2"
+            self.book1.save()
+        # До COMMIT версия не меняется: параллельный GET не закеширует
+        # старые строки под новой версией
+        self.assertEqual(get_library_api_cache_version(), version)
+        self.assertIn(invalidate_library_api_cache, callbacks)
+        for callback in callbacks:
+            callback()
+        self.assertGreater(get_library_api_cache_version(), version)
+
+    def test_book_item_retrieve_etag_not_modified(self):
+        url = f"/library/books/{self.book1.id}/items/{self.item1.id}/"
+        resp = self.client.get(url)
+        etag = resp.headers["ETag"]
+        with self.assertNumQueries(0):
+            resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.patch(f"{url}change_status/", {"status": BookItem.STATUS_RESERVED}, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data["status"], BookItem.STATUS_RESERVED)
+
+    def test_change_status_single_update(self):
+        with self.assertNumQueries(1), self.captureOnCommitCallbacks() as callbacks:
+            self.item1.change_status(BookItem.STATUS_LOST)
+        self.assertEqual(callbacks, [invalidate_library_api_cache])
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.item1.change_status(BookItem.STATUS_AVAILABLE, invalidate_cache=False)
+        self.assertEqual(callbacks, [])
+        self.item1.change_status(BookItem.STATUS_LOST)
+        self.item1.refresh_from_db(fields=["status"])
+        self.assertEqual(self.item1.status, BookItem.STATUS_LOST)
+        with self.assertRaises(ValueError):
+            self.item1.change_status("X")
+
+    def test_author_list_prefetches_only_book_ids(self):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get("/library/authors/")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        # Последний запрос — предзагрузка книг авторов
+        books_sql = ctx.captured_queries[-1]["sql"]
+        self.assertIn("library_book", books_sql)
+        self.assertNotIn('"page_counts"', books_sql)
+
+    def test_author_list_books_ordered_by_title(self):
+        book = Book.objects.create(title="Книга 0", isbn="978-5-17-333333-3", subject="Поэзия", page_counts=10)
+        book.author.add(self.author1)
+        resp = self.client.get("/library/authors/")
+        books = {author["name"]: author["books"] for author in resp.data}
+        self.assertEqual(books["Пушкин"], [book.id, self.book1.id])
+
+    def test_no_default_ordering(self):
+        with CaptureQueriesContext(connection) as ctx:
+            BookItem.objects.filter(status=BookItem.STATUS_AVAILABLE).count()
+            list(Book.objects.all())
+        for query in ctx.captured_queries:
+            self.assertNotIn("ORDER BY", query["sql"])
+        resp = self.client.get("/library/authors/")
+        self.assertEqual([author["name"] for author in resp.data], ["Лермонтов", "Пушкин"])
+
+    def test_search_and_ordering_books(self):
+        resp = self.client.get("/library/books/", {"search": "Лермонтов"})
+        self.assertEqual([book["title"] for book in resp.data["results"]], ["Книга Б"])
+        resp = self.client.get("/library/books/", {"ordering": "-title"})
+        self.assertEqual([book["title"] for book in resp.data["results"]], ["Книга Б", "Книга А"])
+
+    def test_cursor_pagination_ignores_nullable_ordering(self):
+        Book.objects.create(title="Книга В", isbn="978-5-17-333333-3", subject="Роман", page_counts=None)
+        titles = []
+        resp = self.client.get("/library/books/", {"ordering": "page_counts", "page_size": 1})
+        while True:
+            self.assertEqual(resp.status_code, status.HTTP_200_OK)
+            titles += [book["title"] for book in resp.data["results"]]
+            if resp.data["next"] is None:
+                break
+            resp = self.client.get(resp.data["next"])
+        # ordering=page_counts не принимается: порядок по названию
+        self.assertEqual(titles, ["Книга А", "Книга Б", "Книга В"])
+
+    def test_available_copies_single_query(self):
+        BookItem.objects.create(book=self.book1, barcode="BC-3", status=BookItem.STATUS_BORROWED, publication_date=date(2012, 1, 1))
+        with self.assertNumQueries(1):
+            resp = self.client.get(f"/library/books/{self.book1.id}/available_copies/")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data["available_copies"], 1)
+        self.assertEqual(resp.data["total_copies"], 2)
+        resp = self.client.get("/library/books/0/available_copies/")
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_list_books_counts_copies_without_extra_queries(self):
+        BookItem.objects.create(book=self.book1, barcode="BC-3", status=BookItem.STATUS_BORROWED, publication_date=date(2012, 1, 1))
+        self.book1.author.add(self.author2)
+        # Книги с GROUP BY по экземплярам + предзагрузка авторов
+        with self.assertNumQueries(2):
+            resp = self.client.get("/library/books/", {"author__name__icontains": "н"})
+        book = next(book for book in resp.data["results"] if book["id"] == self.book1.id)
+        self.assertEqual((book["available_copies"], book["total_copies"]), (1, 2))
+
+    def test_get_available_copies_uses_prefetched_items(self):
+        BookItem.objects.create(book=self.book1, barcode="BC-3", status=BookItem.STATUS_LOST, publication_date=date(2012, 1, 1))
+        # Книга и её экземпляры
+        with self.assertNumQueries(2):
+            prefetched = list(Book.objects.prefetch_related("book_items").filter(pk=self.book1.pk))
+        with self.assertNumQueries(0):
+            self.assertEqual(prefetched[0].get_available_copies(), 1)
+
+    def test_book_item_retrieve_selects_only_rendered_columns(self):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(f"/library/books/{self.book1.id}/items/{self.item1.id}/")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(ctx.captured_queries), 2)
+        self.assertNotIn('"book_authors"', ctx.captured_queries[0]["sql"])
+        self.assertEqual(resp.data["book"]["author"][0]["name"], "Пушкин")
+
+    def test_bulk_change_status_requires_librarian(self):
+        url = f"/library/books/{self.book1.id}/items/bulk_change_status/"
+        payload = {"ids": [self.item1.id], "status": BookItem.STATUS_LOST}
+        resp = self.client.post(url, payload, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.client.force_authenticate(user=self.user)
+        resp = self.client.post(url, payload, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_403_FORBIDDEN)
+        self.item1.refresh_from_db(fields=["status"])
+        self.assertEqual(self.item1.status, BookItem.STATUS_AVAILABLE)
+
+    def test_bulk_change_status_single_update(self):
+        item3 = BookItem.objects.create(book=self.book1, barcode="BC-3", status=BookItem.STATUS_AVAILABLE, publication_date=date(2012, 1, 1))
+        self.client.force_authenticate(user=self.admin)
+        url = f"/library/books/{self.book1.id}/items/bulk_change_status/"
+        payload = {"ids": [self.item1.id, item3.id, self.item2.id], "status": BookItem.STATUS_RESERVED}
+        with self.assertNumQueries(1), self.captureOnCommitCallbacks() as callbacks:
+            resp = self.client.post(url, payload, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(callbacks, [invalidate_library_api_cache])
+        # item2 относится к другой книге и не меняется
+        self.assertEqual(resp.data, {"updated": 2})
+        self.assertEqual(
+            set(BookItem.objects.values_list("barcode", "status")),
+            {("BC-1", "R"), ("BC-2", "A"), ("BC-3", "R")},
+        )
+
+        resp = self.client.post(url, {"ids": [self.item1.id], "status": "X"}, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_isbn_and_barcode_validators(self):
+        ISBN_VALIDATOR("978-5-17-111111-1")
+        BARCODE_VALIDATOR("4600000000001")
+        for barcode in ("460000000000", "46000000000012", "460000000000X", "١٢٣٤٥٦٧٨٩٠١٢٣"):
+            with self.assertRaises(ValidationError, msg=barcode):
+                BARCODE_VALIDATOR(barcode)
+        with self.assertRaises(ValidationError):
+            ISBN_VALIDATOR("not-an-isbn")
+
+    def test_popular_books_ranking_is_cached(self):
+        BookItem.objects.create(book=self.book2, barcode="BC-3", status=BookItem.STATUS_AVAILABLE, publication_date=date(2012, 1, 1))
+        # Рейтинг по экземплярам + книги со счетчиками + авторы
+        with self.assertNumQueries(3):
+            resp = self.client.get("/library/books/popular/")
+        self.assertEqual([book["title"] for book in resp.data], ["Книга Б", "Книга А"])
+        self.assertEqual(resp.data[0]["total_copies"], 2)
+        with self.assertNumQueries(2):
+            self.client.get("/library/books/popular/")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            BookItem.objects.create(book=self.book1, barcode="BC-4", status=BookItem.STATUS_AVAILABLE, publication_date=date(2012, 1, 1))
+            BookItem.objects.create(book=self.book1, barcode="BC-5", status=BookItem.STATUS_AVAILABLE, publication_date=date(2012, 1, 1))
+        resp = self.client.get("/library/books/popular/")
+        self.assertEqual([book["title"] for book in resp.data], ["Книга А", "Книга Б"])
+
+    def test_book_representation_cached_until_book_or_author_changes(self):
+        book = Book.objects.get(pk=self.book1.pk)
+        self.assertEqual(BookSerializer(book).data["author"][0]["name"], "Пушкин")
+        book = Book.objects.get(pk=self.book1.pk)
+        # Представление из кеша: авторы не запрашиваются
+        with self.assertNumQueries(0):
+            self.assertEqual(BookSerializer(book).data["title"], "Книга А")
+
+        self.author1.name = "Пушкин А. С."
+        self.author1.save()
+        book = Book.objects.get(pk=self.book1.pk)
+        self.assertEqual(BookSerializer(book).data["author"][0]["name"], "Пушкин А. С.")
+
+    def test_author_books_count_without_extra_queries(self):
+        self.book2.author.add(self.author1)
+        # Авторы + предзагрузка книг
+        with self.assertNumQueries(2):
+            resp = self.client.get("/library/authors/")
+        counts = {author["name"]: author["books_count"] for author in resp.data}
+        self.assertEqual(counts, {"Пушкин": 2, "Лермонтов": 1})
+        with self.assertNumQueries(1):
+            resp = self.client.get(f"/library/authors/{self.author1.id}/books_count/")
+        self.assertEqual(resp.data["books_count"], 2)
+
+    def test_list_books_cursor_pagination(self):
+        resp = self.client.get("/library/books/", {"page_size": 1})
+        self.assertEqual([book["title"] for book in resp.data["results"]], ["Книга А"])
+        self.assertIsNotNone(resp.data["next"])
+        resp = self.client.get(resp.data["next"])
+        self.assertEqual([book["title"] for book in resp.data["results"]], ["Книга Б"])
+        self.assertIsNone(resp.data["next"])
+
+    def test_nested_book_items_cursor_pagination(self):
+        BookItem.objects.create(book=self.book1, barcode="BC-3", status=BookItem.STATUS_AVAILABLE, publication_date=date(2012, 1, 1))
+        url = f"/library/books/{self.book1.id}/items/"
+        resp = self.client.get(url, {"page_size": 1})
+        self.assertEqual([item["barcode"] for item in resp.data["results"]], ["BC-1"])
+        resp = self.client.get(resp.data["next"])
+        self.assertEqual([item["barcode"] for item in resp.data["results"]], ["BC-3"])
+        self.assertIsNone(resp.data["next"])
+
+    def test_filter_books_by_availability(self):
+        self.item2.change_status(BookItem.STATUS_LOST)
+        resp = self.client.get("/library/books/", {"available": "true"})
+        self.assertEqual([book["title"] for book in resp.data["results"]], ["Книга А"])
+        resp = self.client.get("/library/books/", {"available": "false"})
+        self.assertEqual([book["title"] for book in resp.data["results"]], ["Книга Б"])
+
 # Create your tests here.